@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from wordle.engine import Engine
+from wordle.patterns import Alphabet, parse_feedback
+from wordle.solver import Solver, candidate_entropy_strategy
+from wordle.store import WordStore
+
+
+ACCENTED_WORDS = ["après", "forêt", "fôret", "hélas", "noël", "piège",
+                  "tâche", "zèbre"]
+
+
+def test_decode_accented_letters():
+    words = [word for word in ACCENTED_WORDS if len(word) == 5]
+    alphabet = Alphabet.from_words(words)
+    assert alphabet.decode(alphabet.encode(words)) == words
+
+
+def test_store_words_of_accented_letters():
+    words = sorted(word for word in ACCENTED_WORDS if len(word) == 5)
+    store = WordStore(words)
+    assert store.words_of(np.arange(len(store))) == words
+
+
+def test_solver_plays_accented_words():
+    words = [word for word in ACCENTED_WORDS if len(word) == 5]
+    engine = Engine(words, scoring="patterns", backend="arrays")
+    result = Solver(engine, candidate_entropy_strategy).play("forêt")
+    assert result.solved
+
+
+def test_feedback_rejects_guess_outside_store():
+    words = [word for word in ACCENTED_WORDS if len(word) == 5]
+    engine = Engine(words, scoring="patterns", backend="arrays")
+    state = engine.initial_state()
+    for guess in ("forê", "forêts", "forët"):
+        with pytest.raises(ValueError):
+            engine.state_feedback(state, guess, "b" * len(guess))
+        with pytest.raises(ValueError):
+            engine.apply_feedback(guess, "b" * len(guess))
+    state = engine.state_feedback(state, "FORÊT", "ggggg")
+    assert state.history == (("forêt", parse_feedback("ggggg")),)
+    assert state.count == 1
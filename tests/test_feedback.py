@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from wordle.filters import (DoesNotHaveCharFilter, HasCharInPosFilter,
+                            IncludeCharFilter)
+from wordle.patterns import (ASCII_LOWERCASE, feedback_pattern,
+                             parse_feedback, pattern_rows)
+from wordle.store import Constraint, WordStore
+
+
+DUPLICATE_LETTER_CASES = [
+    ("speed", "abide", "bbyby"),
+    ("eerie", "there", "ybybg"),
+    ("abbey", "babes", "yyggb"),
+    ("llama", "level", "gybbb"),
+    ("geese", "eerie", "bgybg"),
+    ("error", "rarer", "yygbg"),
+    ("mommy", "moody", "ggbbg"),
+    ("crane", "crane", "ggggg"),
+]
+
+WORDS = sorted({word for guess, answer, _ in DUPLICATE_LETTER_CASES
+                for word in (guess, answer)}
+               | {"sleep", "steep", "spade", "three", "ether", "erred",
+                  "boomy", "mummy", "label", "belle"})
+
+
+@pytest.mark.parametrize("guess, answer, feedback", DUPLICATE_LETTER_CASES)
+def test_feedback_pattern(guess: str, answer: str, feedback: str):
+    assert feedback_pattern(guess, answer) == parse_feedback(feedback)
+
+
+@pytest.mark.parametrize("guess, answer, feedback", DUPLICATE_LETTER_CASES)
+def test_pattern_rows(guess: str, answer: str, feedback: str):
+    codes = ASCII_LOWERCASE.encode([guess, answer])
+    assert pattern_rows(codes[:1], codes[1:])[0, 0] == parse_feedback(feedback)
+
+
+def test_pattern_rows_matches_feedback_pattern():
+    codes = ASCII_LOWERCASE.encode(WORDS)
+    expected = [[feedback_pattern(guess, answer) for answer in WORDS]
+                for guess in WORDS]
+    assert pattern_rows(codes, codes).tolist() == expected
+
+
+@pytest.mark.parametrize("guess, answer, feedback", DUPLICATE_LETTER_CASES)
+def test_constraint_with_feedback(guess: str, answer: str, feedback: str):
+    pattern = parse_feedback(feedback)
+    constraint = Constraint.empty(len(guess)).with_feedback(guess, pattern)
+    expected = [word for word in WORDS
+                if feedback_pattern(guess, word) == pattern]
+    assert answer in expected
+    assert [word for word in WORDS if constraint.matches(word)] == expected
+    store = WordStore(WORDS, ASCII_LOWERCASE)
+    ids = store.satisfying(constraint, np.arange(len(store)))
+    assert store.words_of(ids) == expected
+
+
+@pytest.mark.parametrize("filters", [
+    (IncludeCharFilter("e"), DoesNotHaveCharFilter("e")),
+    (HasCharInPosFilter("e", 0), DoesNotHaveCharFilter("e")),
+])
+def test_contradictory_constraint_matches_nothing(filters):
+    constraint = Constraint.empty(5).with_filters(filters)
+    store = WordStore(WORDS, ASCII_LOWERCASE)
+    assert not any(constraint.matches(word) for word in WORDS)
+    assert len(store.satisfying(constraint, np.arange(len(store)))) == 0
+
+
+@pytest.mark.parametrize("filter", [
+    IncludeCharFilter("é"),
+    HasCharInPosFilter("é", 2),
+])
+def test_letter_outside_alphabet_matches_nothing(filter):
+    constraint = Constraint.empty(5).with_filters((filter,))
+    store = WordStore(WORDS, ASCII_LOWERCASE)
+    assert not any(constraint.matches(word) for word in WORDS)
+    assert len(store.satisfying(constraint, np.arange(len(store)))) == 0
@@ -0,0 +1,14 @@
+import numpy as np
+
+from wordle.patterns import top_k
+
+
+def test_top_k_breaks_ties_by_word():
+    words = ["delta", "alpha", "echo", "bravo", "charlie"]
+    scores = np.array([2.0, 1.0, 2.0, 2.0, 3.0])
+    expected = [(3.0, "charlie"), (2.0, "bravo"), (2.0, "delta")]
+    assert top_k(words, scores, 3) == expected
+    shards = [top_k(words[:2], scores[:2], 3), top_k(words[2:], scores[2:], 3)]
+    merged = [item for shard in shards for item in shard]
+    assert top_k([word for _, word in merged],
+                 np.array([score for score, _ in merged]), 3) == expected
@@ -0,0 +1,44 @@
+from importlib import import_module
+from typing import Any
+
+
+EXPORTS = {
+    "Alphabet": "patterns",
+    "Constraint": "store",
+    "DecisionTree": "tree",
+    "DoesNotHaveCharFilter": "filters",
+    "Engine": "engine",
+    "FeedbackFilter": "filters",
+    "GameState": "engine",
+    "GuessMetrics": "patterns",
+    "GuessScores": "patterns",
+    "HasCharInPosFilter": "filters",
+    "IncludeCharFilter": "filters",
+    "LRUCache": "cache",
+    "OpeningBook": "solver",
+    "PatternMatrix": "patterns",
+    "STRATEGIES": "solver",
+    "Solver": "solver",
+    "StepResult": "engine",
+    "TreeBuilder": "tree",
+    "TreeFile": "treefile",
+    "WordStore": "store",
+    "feedback_pattern": "patterns",
+    "load_engine": "resources",
+    "parse_feedback": "patterns",
+    "simulate": "solver",
+}
+
+__all__ = sorted(EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
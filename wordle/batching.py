@@ -0,0 +1,91 @@
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+import asyncio
+import time
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    requests: int = 0
+    largest_batch: int = 0
+    wait_seconds: float = 0.0
+    service_seconds: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+
+    def record(self, size: int, wait_seconds: float, service_seconds: float):
+        self.batches += 1
+        self.requests += size
+        self.largest_batch = max(self.largest_batch, size)
+        self.wait_seconds += wait_seconds
+        self.service_seconds += service_seconds
+
+    def to_json(self) -> Dict[str, float]:
+        batches = max(self.batches, 1)
+        requests = max(self.requests, 1)
+        return {"batches": self.batches, "requests": self.requests,
+                "mean_batch": self.requests / batches,
+                "largest_batch": self.largest_batch,
+                "mean_wait_ms": 1000 * self.wait_seconds / requests,
+                "mean_service_ms": 1000 * self.service_seconds / batches,
+                "requests_per_second":
+                    self.requests / (time.perf_counter() - self.started)}
+
+
+class MicroBatcher:
+    def __init__(self, process: Callable[[List[Any]], Awaitable[List[Any]]],
+                 window: float = 0.002, max_batch: int = 32,
+                 concurrency: int = 1):
+        self.process = process
+        self.window = window
+        self.max_batch = max_batch
+        self.slots = asyncio.Semaphore(concurrency)
+        self.pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self.arrived = asyncio.Event()
+        self.full = asyncio.Event()
+        self.tasks: Set[asyncio.Task] = set()
+        self.stats = BatchStats()
+
+    async def submit(self, item: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((item, future, time.perf_counter()))
+        self.arrived.set()
+        if len(self.pending) >= self.max_batch:
+            self.full.set()
+        return await future
+
+    async def dispatch(self):
+        while True:
+            await self.arrived.wait()
+            if len(self.pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self.full.wait(), self.window)
+                except TimeoutError:
+                    pass
+            await self.slots.acquire()
+            batch = self.pending[:self.max_batch]
+            self.pending = self.pending[self.max_batch:]
+            if not self.pending:
+                self.arrived.clear()
+            if len(self.pending) < self.max_batch:
+                self.full.clear()
+            task = asyncio.create_task(self.run(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        start = time.perf_counter()
+        try:
+            results = await self.process([item for item, _, _ in batch])
+        except Exception as error:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        finally:
+            self.slots.release()
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        waited = sum(start - queued for _, _, queued in batch)
+        self.stats.record(len(batch), waited, time.perf_counter() - start)
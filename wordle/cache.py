@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable
+import threading
+
+
+MISSING = object()
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+    bytes: int = 0
+    max_bytes: int | None = None
+
+
+def nbytes_of(value: Any) -> int:
+    return getattr(value, "nbytes", 0)
+
+
+class LRUCache:
+    def __init__(self, maxsize: int, max_bytes: int | None = None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self.sizes: Dict[Hashable, int] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self.lock:
+            value = self.entries.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        size = nbytes_of(value)
+        with self.lock:
+            self.remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self.entries[key] = value
+            self.sizes[key] = size
+            self.bytes += size
+            while len(self.entries) > self.maxsize or self.over_budget():
+                self.remove(next(iter(self.entries)))
+
+    def over_budget(self) -> bool:
+        return self.max_bytes is not None and self.bytes > self.max_bytes
+
+    def remove(self, key: Hashable) -> Any:
+        self.bytes -= self.sizes.pop(key, 0)
+        return self.entries.pop(key, MISSING)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self.lock:
+            value = self.remove(key)
+            return default if value is MISSING else value
+
+    def stats(self) -> CacheStats:
+        return CacheStats(hits=self.hits, misses=self.misses,
+                          size=len(self.entries), maxsize=self.maxsize,
+                          bytes=self.bytes, max_bytes=self.max_bytes)
@@ -0,0 +1,375 @@
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from .engine import Engine
+from .filters import DoesNotHaveCharFilter, HasCharInPosFilter
+from .loadgen import run_load
+from .lookahead import (DEFAULT_BEAM_WIDTH, LOOKAHEAD_OBJECTIVES,
+                        lookahead)
+from .patterns import METRIC_ORDER, PatternMatrix
+from .resources import load_engine
+from .server import ServiceConfig, serve
+from .snapshot import build_snapshot
+from .solver import STRATEGIES, OpeningBook, Solver, simulate
+from .tree import DEFAULT_BREADTH, DecisionTree, TreeBuilder
+from .treefile import TreeFile, write_tree_file
+
+
+def build_matrix(words_path: str, out_path: str):
+    words: List[str] = json.load(open(words_path))
+    start = time.time()
+    matrix = PatternMatrix.build(words)
+    matrix.save(out_path)
+    print(f"Built {len(words)}x{len(words)} pattern matrix in "
+          f"{time.time() - start:.1f}s -> {out_path}")
+
+
+def demo():
+    words: List[str] = json.load(open("guesses.json"))
+    e = Engine(possible_words=words)
+    start = time.time()
+    result = e.step(
+        "snake", (
+            DoesNotHaveCharFilter("s"),
+            DoesNotHaveCharFilter("n"),
+            HasCharInPosFilter("a", pos=2),
+            HasCharInPosFilter("k", pos=3),
+            HasCharInPosFilter("e", pos=4)
+        ))
+    end = time.time()
+    print((end - start))
+    print(result.actual_information, result.expected_information,
+          len(result.new_possibilities))
+
+
+def load_book(args: argparse.Namespace) -> OpeningBook | None:
+    if args.book is None:
+        return None
+    return OpeningBook.load(args.book, strategy=args.strategy)
+
+
+def build_book(args: argparse.Namespace):
+    engine = load_engine(args.words, args.matrix,
+                         snapshot_path=args.snapshot)
+    start = time.time()
+    book = OpeningBook.build(engine, args.strategy)
+    book.save(args.out)
+    print(f"Built opening book ({book.opening}, {len(book.replies)} replies) "
+          f"in {time.time() - start:.1f}s -> {args.out}")
+
+
+def solve(args: argparse.Namespace):
+    solver = Solver(load_engine(args.words, args.matrix, args.cache_size,
+                                args.snapshot),
+                    strategy=STRATEGIES[args.strategy], book=load_book(args))
+    if args.answer not in solver.engine.store:
+        sys.exit(f"{args.answer!r} is not in {args.words}")
+    result = solver.play(args.answer)
+    print(" ".join(result.guesses), f"({result.seconds:.3f}s)")
+
+
+def benchmark(args: argparse.Namespace):
+    engine = load_engine(args.words, args.matrix, args.cache_size,
+                         args.snapshot)
+    book = load_book(args)
+    solver = Solver(engine, strategy=STRATEGIES[args.strategy], book=book)
+    answers = engine.word_list[:args.limit] if args.limit else engine.word_list
+    if args.workers > 1:
+        simulation = simulate(engine, answers, args.workers, args.words,
+                              args.matrix, args.strategy, book=book,
+                              snapshot_path=args.snapshot)
+        for worker, seconds in sorted(simulation.worker_seconds.items()):
+            print(f"worker {worker}: games={simulation.worker_games[worker]} "
+                  f"time={seconds:.1f}s")
+        report = simulation.report
+    else:
+        report = solver.benchmark(answers)
+    print(f"games={report.games} solved={report.solved} "
+          f"mean_guesses={report.mean_guesses:.3f} "
+          f"max_guesses={report.max_guesses} "
+          f"mean_time={report.mean_seconds:.3f}s "
+          f"max_time={report.max_seconds:.3f}s "
+          f"total_time={report.total_seconds:.1f}s")
+    if engine.cache is not None and args.workers <= 1:
+        stats = engine.cache.stats()
+        print(f"cache hits={stats.hits} misses={stats.misses} "
+              f"size={stats.size}/{stats.maxsize} "
+              f"bytes={stats.bytes / 1e6:.1f}/{stats.max_bytes / 1e6:.0f}MB")
+
+
+def rank(args: argparse.Namespace):
+    engine = load_engine(args.words, args.matrix,
+                         snapshot_path=args.snapshot, threads=args.threads)
+    for guess, feedback in zip(args.guesses[::2], args.guesses[1::2]):
+        engine.apply_feedback(guess, feedback)
+    start = time.perf_counter()
+    best = engine.best_guesses(args.k, workers=args.workers,
+                               metric=args.metric)
+    for _, guess in best:
+        metrics = engine.metrics(guess)
+        print(f"{guess} entropy={metrics.entropy:.4f} "
+              f"largest={metrics.largest_bucket} "
+              f"expected={metrics.expected_remaining:.2f} "
+              f"solve={metrics.solve_probability:.4f} "
+              f"identified={metrics.identified_fraction:.4f}")
+    print(f"ranked {len(engine.word_list)} guesses over "
+          f"{engine.candidate_count()} candidates in "
+          f"{time.perf_counter() - start:.2f}s")
+
+
+def rank_lookahead(args: argparse.Namespace):
+    engine = load_engine(args.words, args.matrix,
+                         snapshot_path=args.snapshot)
+    for guess, feedback in zip(args.guesses[::2], args.guesses[1::2]):
+        engine.apply_feedback(guess, feedback)
+    start = time.perf_counter()
+    scores = lookahead(engine, args.beam_width, args.time_budget,
+                       args.objective)
+    for score in scores:
+        print(f"{score.guess} entropy={score.entropy:.4f} "
+              f"two_step={score.two_step_information:.4f} "
+              f"identified={score.identified_fraction:.4f}")
+    print(f"searched {len(scores)} of {args.beam_width} beam guesses over "
+          f"{engine.candidate_count()} candidates in "
+          f"{time.perf_counter() - start:.2f}s")
+
+
+def build_tree(args: argparse.Namespace):
+    engine = load_engine(args.words, args.matrix,
+                         snapshot_path=args.snapshot)
+    for guess, feedback in zip(args.guesses[::2], args.guesses[1::2]):
+        engine.apply_feedback(guess, feedback)
+    start = time.time()
+    builder = TreeBuilder(engine, args.breadth)
+    tree = builder.build(args.workers)
+    tree.save(args.out, engine.fingerprint)
+    print(f"Built decision tree for {tree.answers} answers "
+          f"(expected {tree.expected_guesses:.4f} guesses, depth "
+          f"{tree.depth()}, {builder.nodes_searched} nodes searched) in "
+          f"{time.time() - start:.1f}s -> {args.out}")
+
+
+def compile_tree(args: argparse.Namespace):
+    tree, words_hash = DecisionTree.load_with_hash(args.tree)
+    write_tree_file(tree, words_hash, args.out)
+    stats = TreeFile.load(args.out).stats()
+    print(f"Compiled {stats['nodes']} nodes over {stats['words']} words "
+          f"({stats['bytes'] / 1e6:.1f}MB of tables) -> {args.out}")
+
+
+def play_tree(args: argparse.Namespace):
+    tree = TreeFile.load(args.tree)
+    with open(args.words) as f:
+        answers: List[str] = [answer for answer in sorted(set(json.load(f)))
+                              if tree.covers(answer)][:args.limit]
+    start = time.perf_counter()
+    games = [tree.play(answer) for answer in answers]
+    seconds = time.perf_counter() - start
+    solved = [guesses for answer, guesses in zip(answers, games)
+              if guesses[-1] == answer]
+    mean = sum(map(len, solved)) / max(len(solved), 1)
+    print(f"games={len(games)} solved={len(solved)} "
+          f"mean_guesses={mean:.3f} "
+          f"games_per_second={len(games) / seconds:.0f}")
+
+
+def run_server(args: argparse.Namespace):
+    load_book(args)
+    config = ServiceConfig(words_path=args.words, matrix_path=args.matrix,
+                           snapshot_path=args.snapshot,
+                           strategy=args.strategy, book_path=args.book,
+                           cache_size=args.cache_size,
+                           batch_window=args.batch_window / 1000,
+                           max_batch=args.max_batch)
+    serve(config, args.host, args.port, args.workers, args.max_sessions)
+
+
+def load_test(args: argparse.Namespace):
+    report = run_load(args.host, args.port, args.words, args.sessions,
+                      args.games, args.seed)
+    print(f"sessions={report.sessions} games={report.games} "
+          f"requests={report.requests} errors={report.errors} "
+          f"requests_per_second={report.requests / report.seconds:.0f}")
+    print(f"latency p50={report.p50 * 1000:.1f}ms "
+          f"p99={report.p99 * 1000:.1f}ms max={report.max * 1000:.1f}ms")
+
+
+def thread_scaling(args: argparse.Namespace):
+    engine = load_engine(args.words, args.matrix,
+                         snapshot_path=args.snapshot)
+    for guess, feedback in zip(args.guesses[::2], args.guesses[1::2]):
+        engine.apply_feedback(guess, feedback)
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python {sys.version.split()[0]} "
+          f"gil={'enabled' if gil else 'disabled'} "
+          f"cpus={os.cpu_count()} guesses={len(engine.word_list)} "
+          f"candidates={engine.candidate_count()}")
+    baseline = None
+    for threads in args.threads:
+        engine.threads = threads
+        seconds = min(timed(lambda: engine.compute_metrics_many(
+                          engine.word_list, first_turn=False))
+                      for _ in range(args.repeat))
+        baseline = baseline or seconds
+        print(f"threads={threads} {seconds:.2f}s "
+              f"speedup={baseline / seconds:.2f}x")
+
+
+def timed(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+IMPORT_TIME_BUDGETS: Dict[str, float] = {
+    "wordle": 0.05,
+    "wordle.engine": 0.5,
+}
+
+
+def measure_import_time(module: str) -> float:
+    code = ("import time; start = time.perf_counter(); "
+            f"import {module}; print(time.perf_counter() - start)")
+    output = subprocess.run([sys.executable, "-c", code], check=True,
+                            capture_output=True, text=True).stdout
+    return float(output)
+
+
+def import_time(args: argparse.Namespace):
+    over_budget = False
+    for module, budget in IMPORT_TIME_BUDGETS.items():
+        seconds = min(measure_import_time(module) for _ in range(args.runs))
+        status = "ok" if seconds <= budget else "OVER BUDGET"
+        over_budget |= seconds > budget
+        print(f"{module}: {seconds * 1000:.1f}ms "
+              f"(budget {budget * 1000:.0f}ms) {status}")
+    if over_budget:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wordle entropy engine")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("demo")
+    timing = commands.add_parser("import-time")
+    timing.add_argument("--runs", type=int, default=3)
+    build = commands.add_parser("build-matrix")
+    build.add_argument("--words", default="guesses.json")
+    build.add_argument("--out", default="patterns.npy")
+    snapshot = commands.add_parser("build-snapshot")
+    snapshot.add_argument("--words", default="guesses.json")
+    snapshot.add_argument("--out", default="guesses.snapshot.npz")
+    snapshot.add_argument("--format", choices=("npz", "words"), default="npz")
+    ranking = commands.add_parser("rank")
+    ranking.add_argument("--words", default="guesses.json")
+    ranking.add_argument("--matrix", default=None)
+    ranking.add_argument("--snapshot", default=None)
+    ranking.add_argument("-k", type=int, default=10)
+    ranking.add_argument("--workers", type=int, default=1)
+    ranking.add_argument("--threads", type=int, default=1)
+    ranking.add_argument("--metric", choices=METRIC_ORDER, default="entropy")
+    ranking.add_argument("guesses", nargs="*",
+                         help="guess and feedback pairs, e.g. raise bbygb")
+    search = commands.add_parser("lookahead")
+    search.add_argument("--words", default="guesses.json")
+    search.add_argument("--matrix", default=None)
+    search.add_argument("--snapshot", default=None)
+    search.add_argument("--beam-width", type=int, default=DEFAULT_BEAM_WIDTH)
+    search.add_argument("--time-budget", type=float, default=None)
+    search.add_argument("--objective", choices=LOOKAHEAD_OBJECTIVES,
+                        default="information")
+    search.add_argument("guesses", nargs="*",
+                        help="guess and feedback pairs, e.g. raise bbygb")
+    tree = commands.add_parser("build-tree")
+    tree.add_argument("--words", default="guesses.json")
+    tree.add_argument("--matrix", default=None)
+    tree.add_argument("--snapshot", default=None)
+    tree.add_argument("--breadth", type=int, default=DEFAULT_BREADTH)
+    tree.add_argument("--workers", type=int, default=1)
+    tree.add_argument("--out", default="decision_tree.json")
+    tree.add_argument("guesses", nargs="*",
+                      help="guess and feedback pairs, e.g. raise bbygb")
+    compiling = commands.add_parser("compile-tree")
+    compiling.add_argument("--tree", default="decision_tree.json")
+    compiling.add_argument("--out", default="decision_tree.bin")
+    playing = commands.add_parser("play-tree")
+    playing.add_argument("--tree", default="decision_tree.bin")
+    playing.add_argument("--words", default="guesses.json")
+    playing.add_argument("--limit", type=int, default=None)
+    scaling = commands.add_parser("thread-scaling")
+    scaling.add_argument("--words", default="guesses.json")
+    scaling.add_argument("--matrix", default=None)
+    scaling.add_argument("--snapshot", default=None)
+    scaling.add_argument("--threads", type=int, nargs="+",
+                         default=[1, 2, 4, 8])
+    scaling.add_argument("--repeat", type=int, default=3)
+    scaling.add_argument("guesses", nargs="*",
+                         help="guess and feedback pairs, e.g. raise bbygb")
+    loading = commands.add_parser("loadgen")
+    loading.add_argument("--host", default="127.0.0.1")
+    loading.add_argument("--port", type=int, default=8080)
+    loading.add_argument("--words", default="guesses.json")
+    loading.add_argument("--sessions", type=int, default=100)
+    loading.add_argument("--games", type=int, default=1)
+    loading.add_argument("--seed", type=int, default=0)
+    for name in ("solve", "benchmark", "build-book", "serve"):
+        game = commands.add_parser(name)
+        game.add_argument("--words", default="guesses.json")
+        game.add_argument("--matrix", default=None)
+        game.add_argument("--snapshot", default=None)
+        game.add_argument("--strategy", choices=STRATEGIES,
+                          default="max-entropy")
+        if name == "build-book":
+            game.add_argument("--out", default="opening_book.json")
+            continue
+        game.add_argument("--book", default=None)
+        game.add_argument("--cache-size", type=int, default=256)
+        if name == "serve":
+            game.add_argument("--host", default="127.0.0.1")
+            game.add_argument("--port", type=int, default=8080)
+            game.add_argument("--workers", type=int, default=1)
+            game.add_argument("--max-sessions", type=int, default=100_000)
+            game.add_argument("--batch-window", type=float, default=2.0,
+                              help="suggest batching window in ms, 0 disables")
+            game.add_argument("--max-batch", type=int, default=32)
+        elif name == "solve":
+            game.add_argument("answer")
+        else:
+            game.add_argument("--limit", type=int, default=None)
+            game.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    if args.command == "build-matrix":
+        build_matrix(args.words, args.out)
+    elif args.command == "import-time":
+        import_time(args)
+    elif args.command == "build-snapshot":
+        build_snapshot(args.words, args.out, args.format)
+    elif args.command == "build-book":
+        build_book(args)
+    elif args.command == "rank":
+        rank(args)
+    elif args.command == "build-tree":
+        build_tree(args)
+    elif args.command == "compile-tree":
+        compile_tree(args)
+    elif args.command == "play-tree":
+        play_tree(args)
+    elif args.command == "thread-scaling":
+        thread_scaling(args)
+    elif args.command == "serve":
+        run_server(args)
+    elif args.command == "loadgen":
+        load_test(args)
+    elif args.command == "lookahead":
+        rank_lookahead(args)
+    elif args.command == "solve":
+        solve(args)
+    elif args.command == "benchmark":
+        benchmark(args)
+    else:
+        demo()
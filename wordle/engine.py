@@ -0,0 +1,581 @@
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import product
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Set, Tuple
+import hashlib
+import heapq
+
+import numpy as np
+
+from . import parallel
+from .cache import MISSING, LRUCache
+from .filters import (DoesNotHaveCharFilter, FilterFn, HasCharInPosFilter,
+                      IncludeCharFilter, split_filters)
+from .patterns import (METRIC_ORDER, GuessMetrics, GuessScores,
+                       PatternMatrix, all_green, bincount_rows,
+                       expected_information, feedback_pattern, information,
+                       parse_feedback, pattern_count, pattern_rows,
+                       scores_of_patterns, top_k)
+from .store import BitsetIndex, Constraint, WordStore, pack_ids, unpack_ids
+
+
+SCORING_MODES = ("filters", "patterns")
+BACKENDS = ("sets", "bitset", "arrays")
+PARALLEL_MIN_CELLS = 1 << 20
+CACHE_MAX_BYTES = 64 << 20
+
+
+@dataclass
+class StepResult:
+    new_possibilities: Set[str]
+    expected_information: float
+    actual_information: float
+
+
+@dataclass(frozen=True)
+class GameState:
+    candidates: int
+    count: int
+    constraint: Constraint
+    history: Tuple[Tuple[str, int], ...] = ()
+
+
+def ids_fingerprint(ids: np.ndarray) -> bytes:
+    packed = ids.astype(np.uint32).tobytes()
+    return hashlib.blake2b(packed, digest_size=16).digest()
+
+
+class Engine:
+    def __init__(self, possible_words: Iterable[str] | WordStore,
+                 scoring: str = "filters",
+                 pattern_matrix: PatternMatrix | None = None,
+                 backend: str = "sets", cache_size: int = 0,
+                 threads: int = 1):
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode: {scoring}")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown index backend: {backend}")
+        self.scoring = scoring
+        self.backend = backend
+        self.pattern_matrix = pattern_matrix
+        self.cache = (LRUCache(cache_size, CACHE_MAX_BYTES)
+                      if cache_size > 0 else None)
+        self.threads = threads
+        self.init_guesses(possible_words)
+        self.current_filters: List[Tuple[FilterFn]] = []
+
+    def init_guesses(self, guesses: Iterable[str] | WordStore):
+        if isinstance(guesses, WordStore):
+            self.store = guesses
+        else:
+            self.store = WordStore(sorted(set(guesses)))
+        self.word_list = self.store.words
+        self.fingerprint = self.store.fingerprint
+        self.includeset_dict: Dict[FilterFn, Set[str]] = {}
+        if self.backend == "sets":
+            self.includeset_dict = self.build_includeset_dict()
+        if self.backend == "bitset":
+            self.bitset_index = BitsetIndex(self.store)
+        self.set_candidates(np.arange(len(self.store)))
+        self.constraint = self.store.empty_constraint()
+        self.feedback_history: List[Tuple[str, int]] = []
+        if self.pattern_matrix is not None:
+            self.matrix_ids = self.pattern_matrix.ids(self.word_list)
+
+    def set_candidates(self, ids: np.ndarray):
+        self.candidate_id_array: np.ndarray | None = ids
+        self.candidate_words: Set[str] | None = None
+        self.candidate_fingerprint: bytes | None = None
+        if self.backend == "bitset":
+            self.live_mask = self.bitset_index.mask_of_ids(ids)
+
+    def set_possible_words(self, words: Set[str]):
+        self.candidate_id_array = None
+        self.candidate_words = words
+        self.candidate_fingerprint = None
+        if self.backend == "bitset":
+            self.live_mask = self.bitset_index.mask_of(words)
+
+    @property
+    def possible_words(self) -> Set[str]:
+        if self.candidate_words is None:
+            self.candidate_words = set(
+                self.store.words_of(self.candidate_id_array))
+        return self.candidate_words
+
+    @possible_words.setter
+    def possible_words(self, words: Set[str]):
+        self.set_possible_words(words)
+
+    @property
+    def candidate_ids(self) -> np.ndarray:
+        if self.candidate_id_array is None:
+            if self.backend == "bitset":
+                self.candidate_id_array = self.bitset_index.ids_of(
+                    self.live_mask)
+            else:
+                self.candidate_id_array = self.store.ids(self.candidate_words)
+        return self.candidate_id_array
+
+    def candidate_count(self) -> int:
+        if self.candidate_id_array is not None:
+            return len(self.candidate_id_array)
+        return len(self.candidate_words)
+
+    def first_candidate(self) -> str:
+        if self.candidate_count() == 0:
+            raise ValueError("No candidates match the feedback so far")
+        return self.word_list[self.candidate_ids[0]]
+
+    def candidates_fingerprint(self) -> bytes:
+        if self.candidate_fingerprint is None:
+            self.candidate_fingerprint = ids_fingerprint(self.candidate_ids)
+        return self.candidate_fingerprint
+
+    def guesses_key(self, words: List[str]) -> str:
+        if words is self.word_list:
+            return self.fingerprint
+        digest = hashlib.blake2b("\n".join(words).encode(), digest_size=16)
+        return digest.hexdigest()
+
+    def cached(self, key: Tuple[Hashable, ...], compute: Callable[[], Any],
+               fingerprint: bytes | None = None):
+        if self.cache is None:
+            return compute()
+        if fingerprint is None:
+            fingerprint = self.candidates_fingerprint()
+        full_key = (fingerprint, *key)
+        value = self.cache.get(full_key)
+        if value is MISSING:
+            value = compute()
+            self.cache.put(full_key, value)
+        return value
+
+    def reset(self):
+        self.set_candidates(np.arange(len(self.store)))
+        self.constraint = self.constraint.cleared()
+        self.current_filters = []
+        self.feedback_history: List[Tuple[str, int]] = []
+
+    def replay(self, filter_history: Iterable[Tuple[FilterFn, ...]]):
+        history = list(filter_history)
+        self.reset()
+        self.constraint = Constraint.compile(self.store.length, history,
+                                             self.store.alphabet)
+        self.set_candidates(self.store.satisfying(self.constraint,
+                                                  self.candidate_ids))
+        self.current_filters = history
+
+    def valid_hard_mode(self, word: str) -> bool:
+        return self.constraint.hard_mode_allows(word)
+
+    def build_word_filtersets(self, word: str) -> Iterable[Tuple[FilterFn]]:
+        filters_per_char: List[List[FilterFn]] = []
+        seen_chars: Set[str] = set()
+        for i, char in enumerate(word):
+            position_filters = [DoesNotHaveCharFilter(char=char),
+                                HasCharInPosFilter(char=char, pos=i)]
+            if char not in seen_chars:
+                position_filters.append(IncludeCharFilter(char=char))
+            seen_chars.add(char)
+            filters_per_char.append(position_filters)
+        inner_product: Iterable[Tuple[FilterFn, ...]] = product(*filters_per_char)  # noqa
+        return inner_product
+
+    def build_word_includeset(self, word: str) -> Set[FilterFn]:
+        alphabet = set(self.store.alphabet.letters)
+        filters_per_char: Set[FilterFn] = set()
+        word_alphabet = set(word)
+        seen_chars: Set[str] = set()
+        for i, char in enumerate(word):
+            filters_per_char.add(HasCharInPosFilter(char, i))
+            if not char in seen_chars:
+                filters_per_char.add(IncludeCharFilter(char))
+                seen_chars.add(char)
+        for missing_char in (alphabet - word_alphabet):
+            filters_per_char.add(DoesNotHaveCharFilter(missing_char))
+        return filters_per_char
+
+    def filter_current_guesses(self, filter_sets: Iterable[Tuple[FilterFn]]):
+        word_sets: List[Set[str]] = []
+        for filter_set in filter_sets:
+            indexed, direct = split_filters(filter_set)
+            partial_filtered_words = [self.includeset_dict[filter]
+                                      for filter in indexed]
+            word_set = self.possible_words.intersection(*partial_filtered_words)  # noqa
+            if direct:
+                word_set = {word for word in word_set
+                            if all(filter(word) for filter in direct)}
+            word_sets.append(word_set)
+        return word_sets
+
+    def filter_current_masks(self, filter_sets: Iterable[Tuple[FilterFn]]):
+        masks: List[int] = []
+        for filter_set in filter_sets:
+            indexed, direct = split_filters(filter_set)
+            mask = self.live_mask
+            for filter in indexed:
+                mask &= self.bitset_index.mask(filter)
+            if direct:
+                ids = self.bitset_index.ids_of(mask)
+                matched = np.ones(len(ids), dtype=bool)
+                for filter in direct:
+                    matched &= self.store.matches(filter, ids)
+                mask = self.bitset_index.mask_of_ids(ids[matched])
+            masks.append(mask)
+        return masks
+
+    def filter_current_id_masks(self, filter_sets: Iterable[Tuple[FilterFn]]):
+        ids = self.candidate_ids
+        filter_matches: Dict[FilterFn, np.ndarray] = {}
+        id_masks: List[np.ndarray] = []
+        for filter_set in filter_sets:
+            matched = np.ones(len(ids), dtype=bool)
+            for filter in filter_set:
+                if filter not in filter_matches:
+                    filter_matches[filter] = self.store.matches(filter, ids)
+                matched &= filter_matches[filter]
+            id_masks.append(matched)
+        return id_masks
+
+    def filter_current_counts(self, filter_sets: Iterable[Tuple[FilterFn]]):
+        if self.backend == "bitset":
+            return [mask.bit_count()
+                    for mask in self.filter_current_masks(filter_sets)]
+        if self.backend == "arrays":
+            return [int(np.count_nonzero(id_mask))
+                    for id_mask in self.filter_current_id_masks(filter_sets)]
+        return [len(word_set)
+                for word_set in self.filter_current_guesses(filter_sets)]
+
+    def filter_entropy(self, word: str):
+        filter_sets = self.build_word_filtersets(word)
+        counts = self.filter_current_counts(filter_sets)
+        entropy = sum(expected_information(count / self.candidate_count())
+                      for count in counts)
+        return entropy
+
+    def pattern_buckets(self, word: str) -> Dict[int, int]:
+        return Counter(feedback_pattern(word, candidate)
+                       for candidate in self.possible_words)
+
+    def pattern_entropy(self, word: str):
+        return self.metrics(word).entropy
+
+    def guess_rows(self, words: List[str]) -> np.ndarray:
+        if self.pattern_matrix is not None:
+            if words is self.word_list:
+                return self.matrix_ids
+            return self.pattern_matrix.ids(words)
+        if words is self.word_list:
+            return self.store.codes
+        return self.store.alphabet.encode(words)
+
+    def candidate_columns(self, candidate_ids: np.ndarray) -> np.ndarray:
+        if self.pattern_matrix is not None:
+            return self.matrix_ids[candidate_ids]
+        return self.store.codes[candidate_ids]
+
+    def pattern_chunks(self, rows: np.ndarray, columns: np.ndarray,
+                       chunk_cells: int = 1 << 22):
+        chunk_size = max(1, chunk_cells // max(len(columns), 1))
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            if self.pattern_matrix is not None:
+                yield self.pattern_matrix.patterns[np.ix_(chunk, columns)]
+            else:
+                yield pattern_rows(chunk, columns)
+
+    def candidate_pattern_chunks(self, words: List[str],
+                                 chunk_cells: int = 1 << 22,
+                                 candidate_ids: np.ndarray | None = None):
+        if candidate_ids is None:
+            candidate_ids = self.candidate_ids
+        return self.pattern_chunks(self.guess_rows(words),
+                                   self.candidate_columns(candidate_ids),
+                                   chunk_cells)
+
+    def metrics_of_rows(self, rows: np.ndarray,
+                        columns: np.ndarray) -> GuessScores:
+        return GuessScores.concatenate([
+            scores_of_patterns(patterns, self.store.length)
+            for patterns in self.pattern_chunks(rows, columns)])
+
+    def compute_metrics_many(self, words: List[str],
+                             candidate_ids: np.ndarray | None = None,
+                             first_turn: bool = True) -> GuessScores:
+        if candidate_ids is None:
+            candidate_ids = self.candidate_ids
+        rows = self.guess_rows(words)
+        matrix = self.pattern_matrix
+        if (first_turn and matrix is not None and matrix.first_turn is not None
+                and len(candidate_ids) == len(matrix.words)):
+            return matrix.first_turn.take(rows).freeze()
+        columns = self.candidate_columns(candidate_ids)
+        if self.threads <= 1 or len(rows) * len(columns) < PARALLEL_MIN_CELLS:
+            return self.metrics_of_rows(rows, columns).freeze()
+        shards = np.array_split(rows, min(self.threads, len(rows)))
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            parts = list(pool.map(
+                lambda shard: self.metrics_of_rows(shard, columns), shards))
+        return GuessScores.concatenate(parts).freeze()
+
+    def metrics_many(self, words: List[str]) -> GuessScores:
+        if not words:
+            return GuessScores(*(np.zeros(0) for _ in METRIC_ORDER))
+        return self.cached(("metrics", self.guesses_key(words)),
+                           lambda: self.compute_metrics_many(words))
+
+    def entropy_many(self, words: List[str]) -> np.ndarray:
+        return self.metrics_many(words).entropy
+
+    def metrics_groups(self, words: List[str],
+                       groups: List[np.ndarray]) -> List[GuessScores]:
+        patterns_per_row = pattern_count(self.store.length)
+        columns = np.concatenate(groups)
+        offsets = np.repeat(np.arange(len(groups)) * patterns_per_row,
+                            [len(group) for group in groups])
+        width = len(groups) * patterns_per_row
+        sizes = np.array([len(group) for group in groups])
+        sparse = len(columns) < width
+        row_cells = len(columns) if sparse else max(width, len(columns))
+        rows = max(1, (1 << 22) // row_cells)
+        solved = all_green(self.store.length)
+        parts: List[GuessScores] = []
+        chunks = self.candidate_pattern_chunks(words, rows * len(columns),
+                                               columns)
+        for patterns in chunks:
+            keys = patterns + offsets
+            if sparse:
+                keys.sort(axis=1)
+                parts.append(GuessScores.from_sorted_keys(
+                    keys, sizes, patterns_per_row, solved))
+                continue
+            counts = bincount_rows(keys, width)
+            counts = counts.reshape(len(patterns) * len(groups),
+                                    patterns_per_row)
+            parts.append(GuessScores.from_counts(counts, solved))
+        scores = GuessScores.concatenate(parts)
+        return [GuessScores(*(getattr(scores, name)[i::len(groups)]
+                              for name in METRIC_ORDER)).freeze()
+                for i in range(len(groups))]
+
+    def metrics(self, word: str) -> GuessMetrics:
+        if self.pattern_matrix is not None or self.backend == "arrays":
+            return self.metrics_many([word])[0]
+        counts = np.zeros((1, pattern_count(self.store.length)), dtype=np.intp)
+        for pattern, count in self.pattern_buckets(word).items():
+            counts[0, pattern] = count
+        return GuessScores.from_counts(counts, all_green(len(word)))[0]
+
+    def best_guesses(self, k: int = 10, workers: int = 1,
+                     guesses: List[str] | None = None,
+                     metric: str = "entropy") -> List[Tuple[float, str]]:
+        key = ("best", k, metric,
+               None if guesses is None else self.guesses_key(guesses))
+        return self.cached(key, lambda: self.compute_best_guesses(
+            k, workers, guesses, metric))
+
+    def compute_best_guesses(self, k: int, workers: int,
+                             guesses: List[str] | None,
+                             metric: str = "entropy"
+                             ) -> List[Tuple[float, str]]:
+        best = self.ranked_guesses(k, workers, guesses, metric)
+        return [(METRIC_ORDER[metric] * score, guess) for score, guess in best]
+
+    def ranked_guesses(self, k: int, workers: int, guesses: List[str] | None,
+                       metric: str = "entropy") -> List[Tuple[float, str]]:
+        guesses = self.word_list if guesses is None else guesses
+        if workers <= 1:
+            scores = self.metrics_many(guesses).ranking(metric)
+            return top_k(guesses, scores, k)
+        shard_size = -(-len(guesses) // workers)
+        shards = [guesses[start:start + shard_size]
+                  for start in range(0, len(guesses), shard_size)]
+        context = parallel.fork_context()
+        forked = context.get_start_method() == "fork"
+        parallel.forked_engine = self if forked else None
+        shipped = None if forked else self
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=parallel.init_scoring_worker,
+                                     initargs=(shipped,)) as pool:
+                local_bests = list(pool.map(parallel.score_shard, shards,
+                                            [k] * len(shards),
+                                            [metric] * len(shards)))
+        finally:
+            parallel.forked_engine = None
+        merged = (best for local in local_bests for best in local)
+        return heapq.nsmallest(k, merged,
+                               key=lambda item: (-item[0], item[1]))
+
+    def entropy(self, word: str):
+        return self.cached((self.scoring, word),
+                           lambda: self.compute_entropy(word))
+
+    def compute_entropy(self, word: str):
+        if self.scoring == "patterns":
+            return self.pattern_entropy(word)
+        return self.filter_entropy(word)
+
+    def build_includeset_dict(self):
+        all_filters: Dict[FilterFn, Set[str]] = defaultdict(set)
+        for word in self.word_list:
+            include_sets = self.build_word_includeset(word)
+            for f in include_sets:
+                all_filters[f].add(word)
+        return all_filters
+
+    def narrow_ids(self, filters: Tuple[FilterFn]) -> np.ndarray:
+        if self.backend == "bitset":
+            new_mask = self.filter_current_masks([filters])[0]
+            return self.bitset_index.ids_of(new_mask)
+        if self.backend == "arrays":
+            constraint = self.constraint.cleared().with_filters(filters)
+            return self.store.satisfying(constraint, self.candidate_ids)
+        return self.store.ids(self.filter_current_guesses([filters])[0])
+
+    def narrow_guesses(self, filters: Tuple[FilterFn]):
+        if self.backend == "bitset":
+            new_mask = self.filter_current_masks([filters])[0]
+            return self.bitset_index.words_of(new_mask)
+        if self.backend == "arrays":
+            return set(self.store.words_of(self.narrow_ids(filters)))
+        new_wordset = self.filter_current_guesses([filters])[0]
+        return new_wordset
+
+    def checked_guess(self, guess: str) -> str:
+        guess = guess.lower()
+        if len(guess) != self.store.length:
+            raise ValueError(f"Guess {guess!r} must have "
+                             f"{self.store.length} letters")
+        if any(char not in self.store.alphabet.index for char in guess):
+            raise ValueError(f"Guess {guess!r} uses letters "
+                             "outside the alphabet")
+        return guess
+
+    def apply_feedback(self, guess: str, feedback: str) -> int:
+        guess = self.checked_guess(guess)
+        if len(feedback) != len(guess):
+            raise ValueError(f"Feedback {feedback!r} does not match "
+                             f"guess {guess!r}")
+        return self.apply_pattern(guess, parse_feedback(feedback))
+
+    def narrow_by_pattern(self, ids: np.ndarray, guess: str,
+                          pattern: int) -> np.ndarray:
+        guess_id = self.store.word_ids.get(guess)
+        if self.pattern_matrix is not None and guess_id is not None:
+            row = self.pattern_matrix.patterns[self.matrix_ids[guess_id]]
+            return ids[row[self.matrix_ids[ids]] == pattern]
+        step_constraint = self.store.empty_constraint().with_feedback(guess,
+                                                                      pattern)
+        return self.store.satisfying(step_constraint, ids)
+
+    def apply_pattern(self, guess: str, pattern: int) -> int:
+        new_ids = self.narrow_by_pattern(self.candidate_ids, guess, pattern)
+        self.set_candidates(new_ids)
+        self.constraint = self.constraint.with_feedback(guess, pattern)
+        self.feedback_history.append((guess, pattern))
+        return len(new_ids)
+
+    def initial_state(self) -> GameState:
+        return GameState(candidates=(1 << len(self.store)) - 1,
+                         count=len(self.store),
+                         constraint=self.store.empty_constraint())
+
+    def state_ids(self, state: GameState) -> np.ndarray:
+        return unpack_ids(state.candidates, len(self.store))
+
+    def state_words(self, state: GameState) -> Set[str]:
+        return set(self.store.words_of(self.state_ids(state)))
+
+    def step_state(self, state: GameState, guess: str,
+                   pattern: int) -> GameState:
+        guess = self.checked_guess(guess)
+        new_ids = self.narrow_by_pattern(self.state_ids(state), guess, pattern)
+        return GameState(candidates=pack_ids(new_ids, len(self.store)),
+                         count=len(new_ids),
+                         constraint=state.constraint.with_feedback(guess,
+                                                                   pattern),
+                         history=(*state.history, (guess, pattern)))
+
+    def state_feedback(self, state: GameState, guess: str,
+                       feedback: str) -> GameState:
+        guess = self.checked_guess(guess)
+        if len(feedback) != len(guess):
+            raise ValueError(f"Feedback {feedback!r} does not match "
+                             f"guess {guess!r}")
+        return self.step_state(state, guess, parse_feedback(feedback))
+
+    def state_metrics(self, state: GameState,
+                      words: List[str] | None = None) -> GuessScores:
+        return self.metrics_of_ids(self.state_ids(state), words)
+
+    def metrics_of_ids(self, ids: np.ndarray,
+                       words: List[str] | None = None) -> GuessScores:
+        words = self.word_list if words is None else words
+        return self.cached(("metrics", self.guesses_key(words)),
+                           lambda: self.compute_metrics_many(words, ids),
+                           fingerprint=ids_fingerprint(ids))
+
+    def suggest(self, state: GameState, metric: str = "entropy",
+                candidates_only: bool = False) -> str:
+        if state.count == 0:
+            raise ValueError("No candidates match the feedback so far")
+        ids = self.state_ids(state)
+        if state.count <= 2:
+            return self.word_list[ids[0]]
+        return self.cached(("suggest", metric, candidates_only),
+                           lambda: self.compute_suggestion(ids, metric,
+                                                           candidates_only),
+                           fingerprint=ids_fingerprint(ids))
+
+    def compute_suggestion(self, ids: np.ndarray, metric: str,
+                           candidates_only: bool = False) -> str:
+        words = self.store.words_of(ids) if candidates_only else self.word_list
+        return words[self.metrics_of_ids(ids, words).best_index(metric)]
+
+    def suggest_many(self, states: List[GameState],
+                     metric: str = "entropy") -> List[str]:
+        guesses: List[str | None] = [None] * len(states)
+        groups: Dict[bytes, Tuple[np.ndarray, List[int]]] = {}
+        for i, state in enumerate(states):
+            if state.count <= 2:
+                guesses[i] = self.suggest(state, metric)
+                continue
+            ids = self.state_ids(state)
+            key = ids_fingerprint(ids)
+            cached = (self.cache.get((key, "suggest", metric, False))
+                      if self.cache is not None else MISSING)
+            if cached is not MISSING:
+                guesses[i] = cached
+                continue
+            groups.setdefault(key, (ids, []))[1].append(i)
+        if groups:
+            scores = self.metrics_groups(self.word_list,
+                                         [ids for ids, _ in groups.values()])
+            for (key, (_, members)), group_scores in zip(groups.items(),
+                                                         scores):
+                guess = self.word_list[group_scores.best_index(metric)]
+                if self.cache is not None:
+                    self.cache.put((key, "suggest", metric, False), guess)
+                for i in members:
+                    guesses[i] = guess
+        return guesses
+
+    def step(self, word: str, new_filter_set: Tuple[FilterFn, ...]) -> StepResult:
+        expected_info = self.entropy(word)
+        previous_count = self.candidate_count()
+        if self.backend == "sets":
+            self.set_possible_words(self.narrow_guesses(new_filter_set))
+        else:
+            self.set_candidates(self.narrow_ids(new_filter_set))
+        p = self.candidate_count() / previous_count
+        actual_info = information(p)
+        self.constraint = self.constraint.with_filters(new_filter_set)
+        self.current_filters.append(new_filter_set)
+        return StepResult(
+            new_possibilities=self.possible_words,
+            expected_information=expected_info,
+            actual_information=actual_info)
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Self
+
+from .patterns import feedback_pattern
+
+
+FilterFn = Callable[[str], bool]
+
+
+@dataclass
+class IncludeCharFilter:
+    char: str
+
+    def __call__(self, candidate: str):
+        return self.char in candidate
+
+    def __hash__(self) -> int:
+        return hash((self.char, "includes"))
+
+    def __eq__(self, __value: Self) -> bool:
+        return self.char == __value.char
+
+
+@dataclass
+class HasCharInPosFilter:
+    char: str
+    pos: int
+
+    def __call__(self, candidate: str):
+        return candidate[self.pos] == self.char
+
+    def __hash__(self) -> int:
+        return hash((self.char, self.pos, "haspos"))
+
+    def __eq__(self, __value: Self) -> bool:
+        return self.char == __value.char and self.pos == __value.pos
+
+
+@dataclass
+class DoesNotHaveCharFilter:
+    char: str
+
+    def __call__(self, candidate: str):
+        return self.char not in candidate
+
+    def __hash__(self) -> int:
+        return hash((self.char, "doesnot"))
+
+    def __eq__(self, __value: Self) -> bool:
+        return self.char == __value.char
+
+
+@dataclass
+class FeedbackFilter:
+    guess: str
+    pattern: int
+
+    def __call__(self, candidate: str):
+        return feedback_pattern(self.guess, candidate) == self.pattern
+
+    def __hash__(self) -> int:
+        return hash((self.guess, self.pattern, "feedback"))
+
+    def __eq__(self, __value: Self) -> bool:
+        return self.guess == __value.guess and self.pattern == __value.pattern
+
+
+INDEXED_FILTERS = (IncludeCharFilter, HasCharInPosFilter,
+                   DoesNotHaveCharFilter)
+
+
+def split_filters(filter_set: Iterable[FilterFn]):
+    indexed: List[FilterFn] = []
+    direct: List[FilterFn] = []
+    for filter in filter_set:
+        if isinstance(filter, INDEXED_FILTERS):
+            indexed.append(filter)
+        else:
+            direct.append(filter)
+    return indexed, direct
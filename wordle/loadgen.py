@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Self, Tuple
+import asyncio
+import json
+import random
+import time
+
+from .patterns import feedback_pattern, format_feedback
+
+
+@dataclass
+class LoadReport:
+    sessions: int
+    games: int
+    requests: int
+    errors: int
+    seconds: float
+    p50: float
+    p99: float
+    max: float
+
+    @classmethod
+    def from_latencies(cls, sessions: int, games: int, errors: int,
+                       latencies: List[float], seconds: float) -> Self:
+        ordered = sorted(latencies) or [0.0]
+        return cls(sessions=sessions, games=games, requests=len(latencies),
+                   errors=errors, seconds=seconds,
+                   p50=percentile(ordered, 0.50),
+                   p99=percentile(ordered, 0.99),
+                   max=ordered[-1])
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HttpClient:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host,
+                                                                 self.port)
+
+    async def request(self, method: str, path: str,
+                      payload: Dict[str, Any] | None = None
+                      ) -> Tuple[int, Dict[str, Any]]:
+        body = json.dumps(payload).encode() if payload is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self.host}\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+class LoadSession:
+    def __init__(self, client: HttpClient, latencies: List[float],
+                 max_turns: int = 12):
+        self.client = client
+        self.latencies = latencies
+        self.max_turns = max_turns
+        self.errors = 0
+
+    async def timed(self, method: str, path: str,
+                    payload: Dict[str, Any] | None = None
+                    ) -> Dict[str, Any] | None:
+        start = time.perf_counter()
+        status, response = await self.client.request(method, path, payload)
+        self.latencies.append(time.perf_counter() - start)
+        if status != 200:
+            self.errors += 1
+            return None
+        return response
+
+    async def play(self, answer: str):
+        game = await self.timed("POST", "/games")
+        if game is None:
+            return
+        path = f"/games/{game['game']}"
+        for _ in range(self.max_turns):
+            suggestion = await self.timed("GET", f"{path}/suggest")
+            if suggestion is None:
+                break
+            guess = suggestion["guess"]
+            feedback = format_feedback(feedback_pattern(guess, answer),
+                                       len(guess))
+            result = await self.timed("POST", f"{path}/feedback",
+                                      {"guess": guess, "feedback": feedback})
+            if result is None or result["solved"]:
+                break
+        await self.timed("DELETE", path)
+
+
+async def generate_load(host: str, port: int, answers: List[str],
+                        sessions: int, games_per_session: int,
+                        seed: int = 0) -> LoadReport:
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    players: List[LoadSession] = []
+
+    async def run_session():
+        client = HttpClient(host, port)
+        await client.connect()
+        player = LoadSession(client, latencies)
+        players.append(player)
+        try:
+            for _ in range(games_per_session):
+                await player.play(rng.choice(answers))
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_session() for _ in range(sessions)))
+    return LoadReport.from_latencies(
+        sessions=sessions, games=sessions * games_per_session,
+        errors=sum(player.errors for player in players),
+        latencies=latencies, seconds=time.perf_counter() - start)
+
+
+def run_load(host: str, port: int, words_path: str, sessions: int,
+             games_per_session: int, seed: int = 0) -> LoadReport:
+    with open(words_path) as f:
+        answers: List[str] = sorted(set(json.load(f)))
+    return asyncio.run(generate_load(host, port, answers, sessions,
+                                     games_per_session, seed))
@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+import time
+
+import numpy as np
+
+from .engine import Engine
+from .patterns import top_k
+
+
+LOOKAHEAD_OBJECTIVES = ("information", "identified")
+DEFAULT_BEAM_WIDTH = 8
+DEFAULT_TIME_BUDGET = 10.0
+
+
+@dataclass
+class LookaheadScore:
+    guess: str
+    entropy: float
+    two_step_information: float
+    identified_fraction: float
+
+    def objective(self, name: str) -> Tuple[float, float]:
+        if name == "identified":
+            return (self.identified_fraction, self.two_step_information)
+        return (self.two_step_information, self.identified_fraction)
+
+
+def bucket_of(engine: Engine, guess: str,
+              candidate_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    chunks = engine.candidate_pattern_chunks([guess],
+                                             candidate_ids=candidate_ids)
+    patterns = next(chunks)[0]
+    buckets, bucket_ids = np.unique(patterns, return_inverse=True)
+    return bucket_ids, np.bincount(bucket_ids, minlength=len(buckets))
+
+
+def second_ply(engine: Engine, candidate_ids: np.ndarray,
+               bucket_ids: np.ndarray, sizes: np.ndarray,
+               follow_ups: List[str],
+               chunk_size: int = 2048) -> Tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(bucket_ids, kind="stable")
+    groups = np.split(candidate_ids[order], np.cumsum(sizes)[:-1])
+    best_entropy = np.zeros(len(sizes))
+    best_identified = np.zeros(len(sizes))
+    for start in range(0, len(follow_ups), chunk_size):
+        scores = engine.metrics_groups(follow_ups[start:start + chunk_size],
+                                       groups)
+        np.maximum(best_entropy, [group.entropy.max() for group in scores],
+                   out=best_entropy)
+        np.maximum(best_identified,
+                   [group.identified_fraction.max() for group in scores],
+                   out=best_identified)
+    return best_entropy, best_identified * sizes
+
+
+def score_two_ply(engine: Engine, candidate_ids: np.ndarray, guess: str,
+                  entropy: float, follow_ups: List[str]) -> LookaheadScore:
+    bucket_ids, sizes = bucket_of(engine, guess, candidate_ids)
+    best_entropy, best_identified = second_ply(engine, candidate_ids,
+                                               bucket_ids, sizes, follow_ups)
+    n = len(bucket_ids)
+    return LookaheadScore(
+        guess=guess, entropy=entropy,
+        two_step_information=entropy + float((sizes * best_entropy).sum()) / n,
+        identified_fraction=float(best_identified.sum()) / n)
+
+
+def lookahead(engine: Engine, beam_width: int = DEFAULT_BEAM_WIDTH,
+              time_budget: float | None = None,
+              objective: str = "information",
+              follow_ups: List[str] | None = None,
+              candidate_ids: np.ndarray | None = None) -> List[LookaheadScore]:
+    if objective not in LOOKAHEAD_OBJECTIVES:
+        raise ValueError(f"Unknown lookahead objective: {objective}")
+    start = time.perf_counter()
+    follow_ups = engine.word_list if follow_ups is None else follow_ups
+    if candidate_ids is None:
+        candidate_ids = engine.candidate_ids
+    beam = top_k(engine.word_list,
+                 engine.metrics_of_ids(candidate_ids).entropy, beam_width)
+    scores: List[LookaheadScore] = []
+    for entropy, guess in beam:
+        if (scores and time_budget is not None
+                and time.perf_counter() - start > time_budget):
+            break
+        scores.append(score_two_ply(engine, candidate_ids, guess, entropy,
+                                    follow_ups))
+    return sorted(scores, key=lambda score: score.objective(objective),
+                  reverse=True)
+
+
+def lookahead_guess(engine: Engine, beam_width: int = DEFAULT_BEAM_WIDTH,
+                    time_budget: float | None = None,
+                    objective: str = "information") -> str:
+    if engine.candidate_count() <= 2:
+        return engine.first_candidate()
+    return lookahead(engine, beam_width, time_budget, objective)[0].guess
@@ -0,0 +1,27 @@
+from typing import TYPE_CHECKING, List, Tuple
+import multiprocessing
+
+from .patterns import top_k
+
+if TYPE_CHECKING:
+    from .engine import Engine
+
+
+forked_engine: "Engine | None" = None
+scoring_engine: "Engine | None" = None
+
+
+def fork_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+
+def init_scoring_worker(engine: "Engine | None"):
+    global scoring_engine
+    scoring_engine = engine if engine is not None else forked_engine
+
+
+def score_shard(guesses: List[str], k: int,
+                metric: str = "entropy") -> List[Tuple[float, str]]:
+    scores = scoring_engine.metrics_many(guesses).ranking(metric)
+    return top_k(guesses, scores, k)
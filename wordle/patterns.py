@@ -0,0 +1,356 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from math import log2
+from typing import Dict, Iterable, List, Self, Tuple
+import json
+import os
+import string
+
+import numpy as np
+
+
+GRAY, YELLOW, GREEN = 0, 1, 2
+FEEDBACK_COLORS = {"b": GRAY, "y": YELLOW, "g": GREEN}
+PATTERN_COUNT = 3 ** 5
+MAX_ALPHABET_SIZE = 64
+PATTERN_DTYPES = ((np.uint8, 5), (np.uint16, 10), (np.uint32, 20))
+METRIC_ORDER = {"entropy": 1, "largest_bucket": -1, "expected_remaining": -1,
+                "solve_probability": 1, "identified_fraction": 1}
+
+
+def information(p: float):
+    if p <= 0:
+        return 0
+    return -log2(p)
+
+
+def expected_information(p: float):
+    return p * information(p)
+
+
+def feedback_pattern(guess: str, answer: str) -> int:
+    colors = [GRAY] * len(guess)
+    unmatched: Dict[str, int] = defaultdict(int)
+    for i, (guess_char, answer_char) in enumerate(zip(guess, answer)):
+        if guess_char == answer_char:
+            colors[i] = GREEN
+        else:
+            unmatched[answer_char] += 1
+    for i, guess_char in enumerate(guess):
+        if colors[i] != GREEN and unmatched[guess_char] > 0:
+            colors[i] = YELLOW
+            unmatched[guess_char] -= 1
+    return sum(color * 3 ** i for i, color in enumerate(colors))
+
+
+def parse_feedback(feedback: str) -> int:
+    pattern = 0
+    for i, color in enumerate(feedback.lower()):
+        if color not in FEEDBACK_COLORS:
+            raise ValueError(f"Unknown feedback color {color!r} "
+                             f"in {feedback!r}")
+        pattern += FEEDBACK_COLORS[color] * 3 ** i
+    return pattern
+
+
+def format_feedback(pattern: int, length: int) -> str:
+    letters = {color: letter for letter, color in FEEDBACK_COLORS.items()}
+    return "".join(letters[color] for color in pattern_colors(pattern, length))
+
+
+def pattern_colors(pattern: int, length: int) -> List[int]:
+    return [(pattern // 3 ** i) % 3 for i in range(length)]
+
+
+def pattern_count(length: int) -> int:
+    return 3 ** length
+
+
+def pattern_dtype(length: int) -> type:
+    for dtype, max_length in PATTERN_DTYPES:
+        if length <= max_length:
+            return dtype
+    raise ValueError(f"Words of length {length} are too long "
+                     "to encode patterns")
+
+
+def all_green(length: int) -> int:
+    return sum(GREEN * 3 ** i for i in range(length))
+
+
+@dataclass(frozen=True)
+class Alphabet:
+    letters: str
+    index: Dict[str, int] = field(init=False, compare=False, hash=False,
+                                  repr=False)
+
+    def __post_init__(self):
+        if len(set(self.letters)) != len(self.letters):
+            raise ValueError(
+                f"Alphabet has repeated letters: {self.letters!r}")
+        if len(self.letters) > MAX_ALPHABET_SIZE:
+            raise ValueError(
+                f"Alphabets are limited to {MAX_ALPHABET_SIZE} letters")
+        object.__setattr__(self, "index",
+                           {char: i for i, char in enumerate(self.letters)})
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> Self:
+        return cls("".join(sorted(set().union(*words))))
+
+    def __len__(self):
+        return len(self.letters)
+
+    @property
+    def mask_dtype(self) -> type:
+        return np.uint32 if len(self.letters) <= 32 else np.uint64
+
+    def bit(self, char: str) -> int:
+        index = self.index.get(char)
+        return 0 if index is None else 1 << index
+
+    def encode(self, words: List[str]) -> np.ndarray:
+        length = len(words[0]) if words else 0
+        if any(len(word) != length for word in words):
+            raise ValueError("All words must have the same length")
+        try:
+            codes = [self.index[char] for word in words for char in word]
+        except KeyError as error:
+            raise ValueError(f"Letter {error.args[0]!r} "
+                             "is not in the alphabet") from error
+        return np.array(codes, dtype=np.uint8).reshape(len(words), length)
+
+    def decode(self, codes: np.ndarray) -> List[str]:
+        length = codes.shape[1]
+        if self.letters.isascii():
+            table = np.frombuffer(self.letters.encode("ascii"), dtype=np.uint8)
+            packed = np.ascontiguousarray(table[codes]).view(f"S{length}")
+            return packed.ravel().astype(f"U{length}").tolist()
+        letters = np.array(list(self.letters))
+        return ["".join(row) for row in letters[codes].tolist()]
+
+
+ASCII_LOWERCASE = Alphabet(string.ascii_lowercase)
+
+
+def letter_masks_of(codes: np.ndarray, alphabet: Alphabet) -> np.ndarray:
+    dtype = alphabet.mask_dtype
+    letter_bits = np.left_shift(dtype(1), codes.astype(dtype), dtype=dtype)
+    return np.bitwise_or.reduce(letter_bits, axis=1)
+
+
+def pattern_rows(guesses: np.ndarray, answers: np.ndarray) -> np.ndarray:
+    length = guesses.shape[1]
+    dtype = pattern_dtype(length)
+    answer_chars = [answers[None, :, k] for k in range(length)]
+    guess_chars = [guesses[:, k, None] for k in range(length)]
+    greens = [guess_chars[k] == answer_chars[k] for k in range(length)]
+    not_greens = [~green for green in greens]
+    patterns = np.zeros(greens[0].shape, dtype=dtype)
+    for i in range(length):
+        available = np.zeros(patterns.shape, dtype=np.uint8)
+        for k in range(length):
+            available += (answer_chars[k] == guess_chars[i]) & not_greens[k]
+        used = np.zeros(patterns.shape, dtype=np.uint8)
+        for j in range(i):
+            used += (guess_chars[j] == guess_chars[i]) & not_greens[j]
+        yellows = not_greens[i] & (available > used)
+        patterns += greens[i] * dtype(GREEN * 3 ** i)
+        patterns += yellows * dtype(YELLOW * 3 ** i)
+    return patterns
+
+
+def entropy_from_counts(counts: np.ndarray) -> float:
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    p = counts[counts > 0] / total
+    return float(-(p * np.log2(p)).sum())
+
+
+def entropies_from_counts(counts: np.ndarray) -> np.ndarray:
+    totals = counts.sum(axis=1, keepdims=True)
+    p = counts / np.maximum(totals, 1)
+    logs = np.log2(p, out=np.zeros_like(p), where=p > 0)
+    return -(p * logs).sum(axis=1)
+
+
+def bincount_rows(patterns: np.ndarray,
+                  patterns_per_row: int = PATTERN_COUNT) -> np.ndarray:
+    rows = patterns.shape[0]
+    offsets = np.arange(rows, dtype=np.intp)[:, None] * patterns_per_row
+    counts = np.bincount((patterns + offsets).ravel(),
+                         minlength=rows * patterns_per_row)
+    return counts.reshape(rows, patterns_per_row)
+
+
+@dataclass(frozen=True)
+class GuessMetrics:
+    entropy: float
+    largest_bucket: int
+    expected_remaining: float
+    solve_probability: float
+    identified_fraction: float
+
+
+@dataclass(frozen=True)
+class GuessScores:
+    entropy: np.ndarray
+    largest_bucket: np.ndarray
+    expected_remaining: np.ndarray
+    solve_probability: np.ndarray
+    identified_fraction: np.ndarray
+
+    @classmethod
+    def from_counts(cls, counts: np.ndarray, solved_pattern: int) -> Self:
+        totals = np.maximum(counts.sum(axis=1), 1)
+        return cls(entropy=entropies_from_counts(counts),
+                   largest_bucket=counts.max(axis=1),
+                   expected_remaining=(
+                       (counts.astype(np.float64) ** 2).sum(axis=1) / totals),
+                   solve_probability=counts[:, solved_pattern] / totals,
+                   identified_fraction=(counts == 1).sum(axis=1) / totals)
+
+    @classmethod
+    def from_sorted_keys(cls, keys: np.ndarray, sizes: np.ndarray,
+                         patterns_per_row: int, solved_pattern: int) -> Self:
+        rows, groups = len(keys), len(sizes)
+        width = groups * patterns_per_row
+        flat = (keys + np.arange(rows)[:, None] * width).ravel()
+        starts = np.flatnonzero(np.diff(flat, prepend=-1))
+        counts = np.diff(starts, append=len(flat)).astype(np.float64)
+        run_keys = flat[starts]
+        cells = run_keys // patterns_per_row
+        n = np.tile(sizes, rows).astype(np.float64)
+
+        def mean(weights: np.ndarray) -> np.ndarray:
+            return np.bincount(cells, weights, rows * groups) / n
+
+        largest = np.zeros(rows * groups)
+        np.maximum.at(largest, cells, counts)
+        solved = run_keys % patterns_per_row == solved_pattern
+        return cls(entropy=np.log2(n) - mean(counts * np.log2(counts)),
+                   largest_bucket=largest.astype(np.intp),
+                   expected_remaining=mean(counts ** 2),
+                   solve_probability=mean(counts * solved),
+                   identified_fraction=mean(counts == 1))
+
+    @classmethod
+    def concatenate(cls, parts: List[Self]) -> Self:
+        return cls(*(np.concatenate([getattr(part, name) for part in parts])
+                     for name in METRIC_ORDER))
+
+    def __len__(self):
+        return len(self.entropy)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in METRIC_ORDER)
+
+    def take(self, indices: np.ndarray) -> Self:
+        return GuessScores(*(getattr(self, name)[indices]
+                             for name in METRIC_ORDER))
+
+    def __getitem__(self, i: int) -> GuessMetrics:
+        return GuessMetrics(
+            entropy=float(self.entropy[i]),
+            largest_bucket=int(self.largest_bucket[i]),
+            expected_remaining=float(self.expected_remaining[i]),
+            solve_probability=float(self.solve_probability[i]),
+            identified_fraction=float(self.identified_fraction[i]))
+
+    def freeze(self) -> Self:
+        for name in METRIC_ORDER:
+            getattr(self, name).flags.writeable = False
+        return self
+
+    def ranking(self, metric: str) -> np.ndarray:
+        if metric not in METRIC_ORDER:
+            raise ValueError(f"Unknown metric: {metric}")
+        return METRIC_ORDER[metric] * getattr(self, metric)
+
+    def best_index(self, metric: str) -> int:
+        return int(np.lexsort((self.solve_probability, self.entropy,
+                               self.ranking(metric)))[-1])
+
+
+def scores_of_patterns(patterns: np.ndarray, length: int) -> GuessScores:
+    patterns_per_row = pattern_count(length)
+    if patterns_per_row > patterns.shape[1]:
+        return GuessScores.from_sorted_keys(np.sort(patterns, axis=1),
+                                            np.array([patterns.shape[1]]),
+                                            patterns_per_row,
+                                            all_green(length))
+    counts = bincount_rows(patterns, patterns_per_row)
+    return GuessScores.from_counts(counts, all_green(length))
+
+
+def top_k(words: List[str], scores: np.ndarray,
+          k: int) -> List[Tuple[float, str]]:
+    if 0 < k < len(words):
+        threshold = np.partition(scores, len(words) - k)[len(words) - k]
+        indices = np.flatnonzero(scores >= threshold)
+    else:
+        indices = np.arange(len(words))
+    return sorted(((float(scores[i]), words[i]) for i in indices),
+                  key=lambda item: (-item[0], item[1]))[:k]
+
+
+class PatternMatrix:
+    def __init__(self, words: List[str], patterns: np.ndarray,
+                 first_turn: GuessScores | None = None):
+        self.words = words
+        self.word_ids = {word: i for i, word in enumerate(words)}
+        self.patterns = patterns
+        self.first_turn = first_turn
+        self.length = len(words[0]) if words else 0
+
+    @classmethod
+    def build(cls, words: List[str], chunk_size: int = 256) -> Self:
+        codes = Alphabet.from_words(words).encode(words)
+        patterns = np.empty((len(words), len(words)),
+                            dtype=pattern_dtype(codes.shape[1]))
+        first_turn: List[GuessScores] = []
+        for start in range(0, len(words), chunk_size):
+            stop = start + chunk_size
+            patterns[start:stop] = pattern_rows(codes[start:stop], codes)
+            first_turn.append(scores_of_patterns(patterns[start:stop],
+                                                 codes.shape[1]))
+        return cls(words, patterns, GuessScores.concatenate(first_turn))
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            np.save(f, self.patterns)
+        with open(f"{path}.words.json", "w") as f:
+            json.dump(self.words, f)
+        if self.first_turn is not None:
+            with open(f"{path}.first.npz", "wb") as f:
+                np.savez(f, **{name: getattr(self.first_turn, name)
+                               for name in METRIC_ORDER})
+
+    @classmethod
+    def load(cls, path: str) -> Self:
+        with open(f"{path}.words.json") as f:
+            words: List[str] = json.load(f)
+        patterns = np.load(path, mmap_mode="r")
+        first_turn = None
+        if os.path.exists(f"{path}.first.npz"):
+            with np.load(f"{path}.first.npz") as data:
+                if all(name in data.files for name in METRIC_ORDER):
+                    first_turn = GuessScores(*(data[name]
+                                               for name in METRIC_ORDER))
+        return cls(words, patterns, first_turn)
+
+    def ids(self, words: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.word_ids[word] for word in words),
+                           dtype=np.intp)
+
+    def pattern_counts(self, guess: str,
+                       candidate_ids: np.ndarray | None = None):
+        row = self.patterns[self.word_ids[guess]]
+        if candidate_ids is not None:
+            row = row[candidate_ids]
+        return np.bincount(row, minlength=pattern_count(self.length))
+
+    def entropy(self, guess: str, candidate_ids: np.ndarray | None = None):
+        return entropy_from_counts(self.pattern_counts(guess, candidate_ids))
@@ -0,0 +1,35 @@
+from functools import lru_cache
+from typing import List
+import json
+import os
+
+from .engine import Engine
+from .patterns import PatternMatrix
+from .snapshot import load_snapshot
+from .store import WordStore
+
+
+@lru_cache(maxsize=None)
+def word_store(words_path: str, snapshot_path: str | None = None) -> WordStore:
+    if snapshot_path is not None:
+        return load_snapshot(snapshot_path, words_path)
+    with open(words_path) as f:
+        words: List[str] = json.load(f)
+    return WordStore(sorted(set(words)))
+
+
+@lru_cache(maxsize=None)
+def pattern_matrix(path: str) -> PatternMatrix:
+    return PatternMatrix.load(path)
+
+
+def load_engine(words_path: str, matrix_path: str | None = None,
+                cache_size: int = 0, snapshot_path: str | None = None,
+                threads: int = 1) -> Engine:
+    if snapshot_path is not None:
+        snapshot_path = os.path.abspath(snapshot_path)
+    store = word_store(os.path.abspath(words_path), snapshot_path)
+    matrix = (pattern_matrix(os.path.abspath(matrix_path))
+              if matrix_path else None)
+    return Engine(store, scoring="patterns", pattern_matrix=matrix,
+                  backend="arrays", cache_size=cache_size, threads=threads)
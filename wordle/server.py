@@ -0,0 +1,290 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
+from itertools import count
+from typing import Any, Callable, Dict, List, Tuple
+import asyncio
+import json
+
+from . import parallel
+from .batching import MicroBatcher
+from .cache import MISSING, LRUCache
+from .engine import Engine, GameState
+from .patterns import parse_feedback
+from .resources import load_engine
+from .solver import STRATEGY_METRICS, OpeningBook, state_guess
+
+
+MAX_BODY_SIZE = 1 << 16
+
+
+@dataclass
+class ServiceConfig:
+    words_path: str
+    matrix_path: str | None = None
+    snapshot_path: str | None = None
+    strategy: str = "max-entropy"
+    book_path: str | None = None
+    cache_size: int = 256
+    batch_window: float = 0.002
+    max_batch: int = 32
+
+
+@dataclass
+class Session:
+    state: GameState | None = None
+    candidates: int = 0
+    solved: bool = False
+
+
+class RequestError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+service_engine: Engine | None = None
+service_book: OpeningBook | None = None
+service_strategy: str | None = None
+service_start: GameState | None = None
+
+
+def init_service_worker(config: ServiceConfig):
+    global service_engine, service_book, service_strategy, service_start
+    service_engine = load_engine(config.words_path, config.matrix_path,
+                                 config.cache_size, config.snapshot_path)
+    service_book = None
+    if config.book_path is not None:
+        service_book = OpeningBook.load(config.book_path,
+                                        service_engine.fingerprint,
+                                        config.strategy)
+    service_strategy = config.strategy
+    service_start = service_engine.initial_state()
+
+
+def candidate_total() -> int:
+    return len(service_engine.store)
+
+
+def narrow_session(state: GameState | None, guess: str,
+                   pattern: int) -> GameState:
+    return service_engine.step_state(state or service_start, guess, pattern)
+
+
+def book_guess(state: GameState) -> str | None:
+    if service_book is None:
+        return None
+    return service_book.lookup(list(state.history))
+
+
+def suggest_session(state: GameState | None) -> str:
+    state = state or service_start
+    guess = book_guess(state)
+    if guess is not None:
+        return guess
+    return state_guess(service_engine, state, service_strategy)
+
+
+def suggest_batch(states: List[GameState | None]) -> List[str]:
+    metric = STRATEGY_METRICS.get(service_strategy)
+    states = [state or service_start for state in states]
+    guesses: List[str | None] = [None] * len(states)
+    pending: List[int] = []
+    for i, state in enumerate(states):
+        if (metric is None or not state.history
+                or book_guess(state) is not None):
+            guesses[i] = suggest_session(state)
+        else:
+            pending.append(i)
+    batched = service_engine.suggest_many([states[i] for i in pending], metric)
+    for i, guess in zip(pending, batched):
+        guesses[i] = guess
+    return guesses
+
+
+async def read_request(reader: asyncio.StreamReader
+                       ) -> Tuple[str, str, Dict[str, str], bytes] | None:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers: Dict[str, str] = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_SIZE:
+        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                           "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def encode_response(status: HTTPStatus, payload: Dict[str, Any],
+                    keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+class WordleService:
+    def __init__(self, config: ServiceConfig, workers: int = 1,
+                 max_sessions: int = 100_000):
+        self.config = config
+        self.sessions = LRUCache(max_sessions)
+        self.session_ids = count(1)
+        self.requests = 0
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=parallel.fork_context(),
+            initializer=init_service_worker, initargs=(config,))
+        self.total_candidates = 0
+        self.batcher: MicroBatcher | None = None
+        if config.batch_window > 0:
+            self.batcher = MicroBatcher(
+                lambda requests: self.run(suggest_batch, requests),
+                config.batch_window, config.max_batch, workers)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    def session(self, game_id: str) -> Session:
+        session = self.sessions.get(game_id)
+        if session is MISSING:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown game {game_id}")
+        return session
+
+    async def new_game(self) -> Dict[str, Any]:
+        game_id = str(next(self.session_ids))
+        self.sessions.put(game_id, Session(candidates=self.total_candidates))
+        return {"game": game_id, "candidates": self.total_candidates}
+
+    async def apply_feedback(self, game_id: str,
+                             body: Dict[str, Any]) -> Dict[str, Any]:
+        session = self.session(game_id)
+        guess, feedback = body.get("guess"), body.get("feedback")
+        if not isinstance(guess, str) or not isinstance(feedback, str):
+            raise RequestError(HTTPStatus.BAD_REQUEST,
+                               "Expected string fields 'guess' and 'feedback'")
+        guess = guess.lower()
+        if len(guess) != len(feedback):
+            raise RequestError(HTTPStatus.BAD_REQUEST,
+                               f"Feedback {feedback!r} does not match "
+                               f"guess {guess!r}")
+        try:
+            pattern = parse_feedback(feedback)
+            state = await self.run(narrow_session, session.state, guess,
+                                   pattern)
+        except ValueError as error:
+            raise RequestError(HTTPStatus.BAD_REQUEST, str(error)) from error
+        if state.count == 0:
+            raise RequestError(HTTPStatus.CONFLICT,
+                               f"Feedback {feedback!r} for {guess!r} "
+                               "leaves no candidates")
+        session.state = state
+        session.candidates = state.count
+        session.solved = set(feedback.lower()) == {"g"}
+        return {"game": game_id, "candidates": session.candidates,
+                "solved": session.solved}
+
+    async def suggest(self, game_id: str) -> Dict[str, Any]:
+        session = self.session(game_id)
+        if self.batcher is not None:
+            guess = await self.batcher.submit(session.state)
+        else:
+            guess = await self.run(suggest_session, session.state)
+        return {"game": game_id, "guess": guess,
+                "candidates": session.candidates}
+
+    def end_game(self, game_id: str) -> Dict[str, Any]:
+        if self.sessions.pop(game_id) is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown game {game_id}")
+        return {"game": game_id}
+
+    def stats(self) -> Dict[str, Any]:
+        sessions = self.sessions.stats()
+        stats: Dict[str, Any] = {"sessions": sessions.size,
+                                 "max_sessions": sessions.maxsize,
+                                 "requests": self.requests}
+        if self.batcher is not None:
+            stats["batching"] = self.batcher.stats.to_json()
+        return stats
+
+    async def route(self, method: str, path: str,
+                    body: bytes) -> Dict[str, Any]:
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        payload = json.loads(body) if body else {}
+        if not isinstance(payload, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST,
+                               "Expected a JSON object")
+        match method, parts:
+            case "POST", ["games"]:
+                return await self.new_game()
+            case "POST", ["games", game_id, "feedback"]:
+                return await self.apply_feedback(game_id, payload)
+            case "GET", ["games", game_id, "suggest"]:
+                return await self.suggest(game_id)
+            case "DELETE", ["games", game_id]:
+                return self.end_game(game_id)
+            case "GET", ["stats"]:
+                return self.stats()
+        raise RequestError(HTTPStatus.NOT_FOUND,
+                           f"No route for {method} {path}")
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        try:
+            while True:
+                keep_alive = True
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    connection = headers.get("connection", "")
+                    keep_alive = connection.lower() != "close"
+                    self.requests += 1
+                    status = HTTPStatus.OK
+                    payload = await self.route(method, path, body)
+                except RequestError as error:
+                    status, payload = error.status, {"error": str(error)}
+                except ValueError as error:
+                    status = HTTPStatus.BAD_REQUEST
+                    payload = {"error": str(error)}
+                writer.write(encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080):
+        self.total_candidates = await self.run(candidate_total)
+        dispatcher = None
+        if self.batcher is not None:
+            dispatcher = asyncio.create_task(self.batcher.dispatch())
+        server = await asyncio.start_server(self.handle, host, port,
+                                            backlog=4096)
+        print(f"Serving on http://{host}:{port} "
+              f"({self.total_candidates} words)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if dispatcher is not None:
+                dispatcher.cancel()
+            self.executor.shutdown(cancel_futures=True)
+
+
+def serve(config: ServiceConfig, host: str = "127.0.0.1", port: int = 8080,
+          workers: int = 1, max_sessions: int = 100_000):
+    service = WordleService(config, workers, max_sessions)
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,87 @@
+from typing import List
+import hashlib
+import json
+import struct
+import time
+
+import numpy as np
+
+from .patterns import Alphabet
+from .store import WordStore
+
+
+SNAPSHOT_VERSION = 3
+WORD_FILE_MAGIC = b"WRDS"
+WORD_FILE_VERSION = 3
+WORD_FILE_HEADER = struct.Struct("<4sBBHQ32s32s")
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def build_snapshot(words_path: str, out_path: str, format: str = "npz"):
+    start = time.time()
+    if format == "words":
+        write_word_file(words_path, out_path)
+    else:
+        words: List[str] = json.load(open(words_path))
+        store = WordStore(sorted(set(words)))
+        with open(out_path, "wb") as f:
+            np.savez(f, version=np.array(SNAPSHOT_VERSION),
+                     source_hash=np.array(file_hash(words_path)),
+                     words_hash=np.array(store.fingerprint),
+                     alphabet=np.array(store.alphabet.letters),
+                     codes=store.codes, letter_masks=store.letter_masks)
+    print(f"Built {format} snapshot in "
+          f"{time.time() - start:.2f}s -> {out_path}")
+
+
+def write_word_file(words_path: str, out_path: str):
+    words: List[str] = json.load(open(words_path))
+    store = WordStore(sorted(set(words)))
+    letters = store.alphabet.letters.encode("utf-8")
+    header = WORD_FILE_HEADER.pack(WORD_FILE_MAGIC, WORD_FILE_VERSION,
+                                   store.length, len(letters), len(store),
+                                   bytes.fromhex(file_hash(words_path)),
+                                   bytes.fromhex(store.fingerprint))
+    with open(out_path, "wb") as f:
+        f.write(header)
+        f.write(letters)
+        f.write(store.codes.tobytes())
+
+
+def load_word_file(path: str, source_path: str | None = None) -> WordStore:
+    with open(path, "rb") as f:
+        header = f.read(WORD_FILE_HEADER.size)
+        (magic, version, length, letters_size, count, source_hash,
+         words_hash) = WORD_FILE_HEADER.unpack(header)
+        letters = f.read(letters_size)
+    if magic != WORD_FILE_MAGIC or version != WORD_FILE_VERSION:
+        raise ValueError(f"Unsupported word file format in {path}")
+    if source_path is not None and source_hash.hex() != file_hash(source_path):
+        raise ValueError(f"Word file {path} is stale for {source_path}, "
+                         "rebuild it with build-snapshot")
+    codes = np.memmap(path, dtype=np.uint8, mode="r",
+                      offset=WORD_FILE_HEADER.size + letters_size,
+                      shape=(count, length))
+    return WordStore.from_codes(codes, Alphabet(letters.decode("utf-8")),
+                                words_hash=words_hash.hex())
+
+
+def load_snapshot(path: str, source_path: str | None = None) -> WordStore:
+    with open(path, "rb") as f:
+        if f.read(len(WORD_FILE_MAGIC)) == WORD_FILE_MAGIC:
+            return load_word_file(path, source_path)
+    with np.load(path) as data:
+        if int(data["version"]) != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version in {path}")
+        source_hash = str(data["source_hash"])
+        if source_path is not None and source_hash != file_hash(source_path):
+            raise ValueError(f"Snapshot {path} is stale for {source_path}, "
+                             "rebuild it with build-snapshot")
+        return WordStore.from_codes(data["codes"],
+                                    Alphabet(str(data["alphabet"])),
+                                    data["letter_masks"],
+                                    str(data["words_hash"]))
@@ -0,0 +1,320 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Self, Tuple
+import json
+import os
+import statistics
+import time
+
+from . import parallel
+from .engine import Engine, GameState, ids_fingerprint
+from .filters import FeedbackFilter
+from .lookahead import DEFAULT_TIME_BUDGET, lookahead, lookahead_guess
+from .patterns import GuessScores, all_green, feedback_pattern
+from .resources import load_engine
+
+
+Strategy = Callable[[Engine], str]
+
+
+STRATEGY_METRICS: Dict[str, str] = {
+    "max-entropy": "entropy",
+    "minimax": "largest_bucket",
+    "expected-remaining": "expected_remaining",
+}
+
+
+def choose_by_metric(guesses: List[str], scores: GuessScores,
+                     metric: str) -> str:
+    return guesses[scores.best_index(metric)]
+
+
+def metric_guess(engine: Engine, metric: str) -> str:
+    if engine.candidate_count() <= 2:
+        return engine.first_candidate()
+    guesses = engine.word_list
+    return choose_by_metric(guesses, engine.metrics_many(guesses), metric)
+
+
+def max_entropy_guess(engine: Engine) -> str:
+    return metric_guess(engine, "entropy")
+
+
+def max_entropy_strategy(engine: Engine) -> str:
+    return engine.cached(("max-entropy",), lambda: max_entropy_guess(engine))
+
+
+def candidate_entropy_guess(engine: Engine) -> str:
+    if engine.candidate_count() <= 2:
+        return engine.first_candidate()
+    candidates = engine.store.words_of(engine.candidate_ids)
+    return choose_by_metric(candidates, engine.metrics_many(candidates),
+                            "entropy")
+
+
+def candidate_entropy_strategy(engine: Engine) -> str:
+    return engine.cached(("candidates",),
+                         lambda: candidate_entropy_guess(engine))
+
+
+def minimax_strategy(engine: Engine) -> str:
+    return engine.cached(("minimax",),
+                         lambda: metric_guess(engine, "largest_bucket"))
+
+
+def expected_remaining_strategy(engine: Engine) -> str:
+    return engine.cached(("expected-remaining",),
+                         lambda: metric_guess(engine, "expected_remaining"))
+
+
+def lookahead_strategy(engine: Engine) -> str:
+    return engine.cached(("lookahead",),
+                         lambda: lookahead_guess(
+                             engine, time_budget=DEFAULT_TIME_BUDGET))
+
+
+STRATEGIES: Dict[str, Strategy] = {
+    "max-entropy": max_entropy_strategy,
+    "candidates": candidate_entropy_strategy,
+    "minimax": minimax_strategy,
+    "expected-remaining": expected_remaining_strategy,
+    "lookahead": lookahead_strategy,
+}
+
+
+def state_guess(engine: Engine, state: GameState, strategy: str) -> str:
+    if strategy in STRATEGY_METRICS:
+        return engine.suggest(state, STRATEGY_METRICS[strategy])
+    if strategy == "candidates":
+        return engine.suggest(state, candidates_only=True)
+    if strategy != "lookahead":
+        raise ValueError(f"Unknown strategy: {strategy}")
+    if state.count <= 2:
+        return engine.suggest(state)
+    ids = engine.state_ids(state)
+    return engine.cached(("lookahead",),
+                         lambda: lookahead(
+                             engine, time_budget=DEFAULT_TIME_BUDGET,
+                             candidate_ids=ids)[0].guess,
+                         fingerprint=ids_fingerprint(ids))
+
+
+OPENING_BOOK_VERSION = 1
+
+
+@dataclass
+class OpeningBook:
+    words_hash: str
+    strategy: str
+    opening: str
+    replies: Dict[int, str]
+
+    @classmethod
+    def build(cls, engine: Engine, strategy: str) -> Self:
+        choose = STRATEGIES[strategy]
+        engine.reset()
+        opening = choose(engine)
+        patterns = sorted({feedback_pattern(opening, word)
+                           for word in engine.word_list})
+        replies: Dict[int, str] = {}
+        for pattern in patterns:
+            if pattern == all_green(len(opening)):
+                continue
+            engine.reset()
+            engine.step(opening, (FeedbackFilter(opening, pattern),))
+            replies[pattern] = choose(engine)
+        engine.reset()
+        return cls(words_hash=engine.fingerprint, strategy=strategy,
+                   opening=opening, replies=replies)
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"version": OPENING_BOOK_VERSION,
+                       "words_hash": self.words_hash,
+                       "strategy": self.strategy,
+                       "opening": self.opening,
+                       "replies": {str(pattern): guess for pattern, guess
+                                   in self.replies.items()}},
+                      f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, words_hash: str | None = None,
+             strategy: str | None = None) -> Self:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != OPENING_BOOK_VERSION:
+            raise ValueError(f"Unsupported opening book version in {path}")
+        if words_hash is not None and data["words_hash"] != words_hash:
+            raise ValueError(
+                "Opening book was built for a different word list")
+        if strategy is not None and data["strategy"] != strategy:
+            raise ValueError(f"Opening book {path} was built for strategy "
+                             f"{data['strategy']}, not {strategy}")
+        return cls(words_hash=data["words_hash"], strategy=data["strategy"],
+                   opening=data["opening"],
+                   replies={int(pattern): guess
+                            for pattern, guess in data["replies"].items()})
+
+    def lookup(self, history: List[Tuple[str, int]]) -> str | None:
+        if not history:
+            return self.opening
+        if len(history) == 1 and history[0][0] == self.opening:
+            return self.replies.get(history[0][1])
+        return None
+
+
+@dataclass
+class GameResult:
+    answer: str
+    guesses: List[str]
+    solved: bool
+    seconds: float
+
+
+@dataclass
+class BenchmarkReport:
+    games: int
+    solved: int
+    mean_guesses: float
+    max_guesses: int
+    mean_seconds: float
+    max_seconds: float
+    total_seconds: float
+
+    @classmethod
+    def from_results(cls, results: List[GameResult],
+                     total_seconds: float) -> Self:
+        guess_counts = [len(result.guesses) for result in results]
+        seconds = [result.seconds for result in results]
+        return cls(games=len(results),
+                   solved=sum(result.solved for result in results),
+                   mean_guesses=statistics.fmean(guess_counts),
+                   max_guesses=max(guess_counts),
+                   mean_seconds=statistics.fmean(seconds),
+                   max_seconds=max(seconds),
+                   total_seconds=total_seconds)
+
+
+class Solver:
+    def __init__(self, engine: Engine,
+                 strategy: Strategy = max_entropy_strategy,
+                 max_turns: int = 12, opening: str | None = None,
+                 book: OpeningBook | None = None):
+        if book is not None and book.words_hash != engine.fingerprint:
+            raise ValueError(
+                "Opening book was built for a different word list")
+        self.engine = engine
+        self.strategy = strategy
+        self.max_turns = max_turns
+        self.opening = opening
+        self.book = book
+
+    def next_guess(self, history: List[Tuple[str, int]]) -> str:
+        if self.book is not None:
+            guess = self.book.lookup(history)
+            if guess is not None:
+                return guess
+        if history:
+            return self.strategy(self.engine)
+        if self.opening is None:
+            self.opening = self.strategy(self.engine)
+        return self.opening
+
+    def play(self, answer: str) -> GameResult:
+        if answer not in self.engine.store:
+            raise ValueError(f"Answer {answer!r} is not in the word list")
+        self.engine.reset()
+        start = time.perf_counter()
+        guesses: List[str] = []
+        history: List[Tuple[str, int]] = []
+        while len(guesses) < self.max_turns:
+            guess = self.next_guess(history)
+            guesses.append(guess)
+            if guess == answer:
+                break
+            pattern = feedback_pattern(guess, answer)
+            history.append((guess, pattern))
+            if self.engine.apply_pattern(guess, pattern) == 0:
+                break
+        return GameResult(answer=answer, guesses=guesses,
+                          solved=guesses[-1] == answer,
+                          seconds=time.perf_counter() - start)
+
+    def benchmark(self, answers: Iterable[str]) -> BenchmarkReport:
+        start = time.perf_counter()
+        results = [self.play(answer) for answer in answers]
+        seconds = time.perf_counter() - start
+        return BenchmarkReport.from_results(results, seconds)
+
+
+@dataclass
+class ShardResult:
+    worker: int
+    results: List[GameResult]
+    seconds: float
+
+
+@dataclass
+class SimulationReport:
+    report: BenchmarkReport
+    worker_seconds: Dict[int, float]
+    worker_games: Dict[int, int]
+
+
+worker_solver: Solver | None = None
+
+
+def init_simulation_worker(words_path: str, matrix_path: str | None,
+                           strategy: str, opening: str,
+                           book: OpeningBook | None, cache_size: int,
+                           snapshot_path: str | None):
+    global worker_solver
+    engine = parallel.forked_engine
+    if engine is None:
+        engine = load_engine(words_path, matrix_path, cache_size,
+                             snapshot_path)
+    worker_solver = Solver(engine, STRATEGIES[strategy], opening=opening,
+                           book=book)
+
+
+def simulate_shard(answers: List[str]) -> ShardResult:
+    start = time.perf_counter()
+    results = [worker_solver.play(answer) for answer in answers]
+    return ShardResult(worker=os.getpid(), results=results,
+                       seconds=time.perf_counter() - start)
+
+
+def simulate(engine: Engine, answers: List[str], workers: int,
+             words_path: str, matrix_path: str | None = None,
+             strategy: str = "max-entropy", shards_per_worker: int = 4,
+             book: OpeningBook | None = None,
+             snapshot_path: str | None = None):
+    start = time.perf_counter()
+    engine.reset()
+    opening = Solver(engine, STRATEGIES[strategy], book=book).next_guess([])
+    shard_count = max(1, min(len(answers), workers * shards_per_worker))
+    shards = [answers[i::shard_count] for i in range(shard_count)]
+    context = parallel.fork_context()
+    forked = context.get_start_method() == "fork"
+    parallel.forked_engine = engine if forked else None
+    cache_size = engine.cache.maxsize if engine.cache is not None else 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=init_simulation_worker,
+                                 initargs=(words_path, matrix_path, strategy,
+                                           opening, book, cache_size,
+                                           snapshot_path)) as pool:
+            shard_results = list(pool.map(simulate_shard, shards))
+    finally:
+        parallel.forked_engine = None
+    worker_seconds: Dict[int, float] = defaultdict(float)
+    worker_games: Dict[int, int] = defaultdict(int)
+    results: List[GameResult] = []
+    for shard in shard_results:
+        worker_seconds[shard.worker] += shard.seconds
+        worker_games[shard.worker] += len(shard.results)
+        results.extend(shard.results)
+    report = BenchmarkReport.from_results(results, time.perf_counter() - start)
+    return SimulationReport(report=report, worker_seconds=dict(worker_seconds),
+                            worker_games=dict(worker_games))
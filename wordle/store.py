@@ -0,0 +1,327 @@
+from collections import Counter, defaultdict
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Self, Set, Tuple
+import hashlib
+
+import numpy as np
+
+from .filters import (DoesNotHaveCharFilter, FeedbackFilter, FilterFn,
+                      HasCharInPosFilter, IncludeCharFilter)
+from .patterns import (ASCII_LOWERCASE, GRAY, GREEN, Alphabet,
+                       letter_masks_of, pattern_colors, pattern_rows)
+
+
+@dataclass(frozen=True)
+class Constraint:
+    length: int
+    alphabet: Alphabet
+    allowed: Tuple[int, ...]
+    min_counts: Tuple[int, ...]
+    max_counts: Tuple[int, ...]
+    extra: Tuple[FilterFn, ...] = ()
+
+    @classmethod
+    def empty(cls, length: int, alphabet: Alphabet = ASCII_LOWERCASE) -> Self:
+        all_letters = (1 << len(alphabet)) - 1
+        return cls(length=length, alphabet=alphabet,
+                   allowed=(all_letters,) * length,
+                   min_counts=(0,) * len(alphabet),
+                   max_counts=(length,) * len(alphabet))
+
+    @classmethod
+    def compile(cls, length: int, filter_sets: Iterable[Iterable[FilterFn]],
+                alphabet: Alphabet = ASCII_LOWERCASE) -> Self:
+        constraint = cls.empty(length, alphabet)
+        for filter_set in filter_sets:
+            constraint = constraint.with_filters(filter_set)
+        return constraint
+
+    @property
+    def all_letters(self) -> int:
+        return (1 << len(self.alphabet)) - 1
+
+    def cleared(self) -> Self:
+        return Constraint.empty(self.length, self.alphabet)
+
+    def replace(self, allowed: List[int], min_counts: List[int],
+                max_counts: List[int], extra: Iterable[FilterFn]) -> Self:
+        return Constraint(length=self.length, alphabet=self.alphabet,
+                          allowed=tuple(allowed), min_counts=tuple(min_counts),
+                          max_counts=tuple(max_counts), extra=tuple(extra))
+
+    def with_feedback(self, guess: str, pattern: int) -> Self:
+        allowed = list(self.allowed)
+        min_counts = list(self.min_counts)
+        max_counts = list(self.max_counts)
+        self.apply_feedback(allowed, min_counts, max_counts, guess, pattern)
+        return self.replace(allowed, min_counts, max_counts, self.extra)
+
+    def with_filters(self, filters: Iterable[FilterFn]) -> Self:
+        allowed = list(self.allowed)
+        min_counts = list(self.min_counts)
+        max_counts = list(self.max_counts)
+        extra = list(self.extra)
+        for filter in filters:
+            if isinstance(filter, HasCharInPosFilter):
+                allowed[filter.pos] &= self.alphabet.bit(filter.char)
+                self.raise_min(allowed, min_counts, filter.char, 1)
+            elif isinstance(filter, IncludeCharFilter):
+                self.raise_min(allowed, min_counts, filter.char, 1)
+            elif isinstance(filter, DoesNotHaveCharFilter):
+                self.lower_max(max_counts, filter.char, 0)
+            elif isinstance(filter, FeedbackFilter):
+                self.apply_feedback(allowed, min_counts, max_counts,
+                                    filter.guess, filter.pattern)
+            else:
+                extra.append(filter)
+        return self.replace(allowed, min_counts, max_counts, extra)
+
+    def raise_min(self, allowed: List[int], min_counts: List[int], char: str,
+                  count: int):
+        index = self.alphabet.index.get(char)
+        if index is not None:
+            min_counts[index] = max(min_counts[index], count)
+        elif count > 0:
+            allowed[:] = [0] * len(allowed)
+
+    def lower_max(self, max_counts: List[int], char: str, count: int):
+        index = self.alphabet.index.get(char)
+        if index is not None:
+            max_counts[index] = min(max_counts[index], count)
+
+    def apply_feedback(self, allowed: List[int], min_counts: List[int],
+                       max_counts: List[int], guess: str, pattern: int):
+        colors = pattern_colors(pattern, len(guess))
+        found: Dict[str, int] = defaultdict(int)
+        grayed: Set[str] = set()
+        for i, (char, color) in enumerate(zip(guess, colors)):
+            if color == GREEN:
+                allowed[i] &= self.alphabet.bit(char)
+            else:
+                allowed[i] &= ~self.alphabet.bit(char)
+            if color == GRAY:
+                grayed.add(char)
+            else:
+                found[char] += 1
+        for char, count in found.items():
+            self.raise_min(allowed, min_counts, char, count)
+        for char in grayed:
+            self.lower_max(max_counts, char, found[char])
+
+    def matches(self, word: str) -> bool:
+        for allowed, char in zip(self.allowed, word):
+            if not allowed & self.alphabet.bit(char):
+                return False
+        counts = Counter(word)
+        for char, lower, upper in zip(self.alphabet.letters, self.min_counts,
+                                      self.max_counts):
+            if not lower <= counts[char] <= upper:
+                return False
+        return all(filter(word) for filter in self.extra)
+
+    def matches_codes(self, codes: np.ndarray,
+                      letter_masks: np.ndarray | None = None) -> np.ndarray:
+        matched = np.ones(len(codes), dtype=bool)
+        for i, allowed in enumerate(self.allowed):
+            if allowed != self.all_letters:
+                table = np.array([(allowed >> index) & 1
+                                  for index in range(len(self.alphabet))],
+                                 dtype=bool)
+                matched &= table[codes[:, i]]
+        for index in range(len(self.alphabet)):
+            lower, upper = self.min_counts[index], self.max_counts[index]
+            if lower == 0 and upper >= self.length:
+                continue
+            if lower > upper:
+                return np.zeros(len(codes), dtype=bool)
+            if (letter_masks is not None
+                    and (lower, upper) in ((0, 0), (1, self.length))):
+                present = (letter_masks & (1 << index)) != 0
+                matched &= ~present if upper == 0 else present
+                continue
+            counts = (codes == index).sum(axis=1)
+            matched &= (counts >= lower) & (counts <= upper)
+        return matched
+
+    def hard_mode_allows(self, word: str) -> bool:
+        for allowed, char in zip(self.allowed, word):
+            if (allowed.bit_count() == 1
+                    and not allowed & self.alphabet.bit(char)):
+                return False
+        counts = Counter(word)
+        return all(counts[char] >= minimum for char, minimum
+                   in zip(self.alphabet.letters, self.min_counts))
+
+
+def words_fingerprint(words: Iterable[str]) -> str:
+    return hashlib.sha256("\n".join(sorted(words)).encode()).hexdigest()
+
+
+class CodedWords(Sequence):
+    def __init__(self, codes: np.ndarray, alphabet: Alphabet,
+                 chunk_size: int = 4096):
+        self.codes = codes
+        self.alphabet = alphabet
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i: int | slice) -> str | List[str]:
+        if isinstance(i, slice):
+            return self.alphabet.decode(self.codes[i])
+        return self.alphabet.decode(self.codes[i:i + 1 or None])[0]
+
+    def __iter__(self) -> Iterator[str]:
+        for start in range(0, len(self.codes), self.chunk_size):
+            chunk = self.codes[start:start + self.chunk_size]
+            yield from self.alphabet.decode(chunk)
+
+
+class SortedCodeIndex(Mapping):
+    def __init__(self, codes: np.ndarray, alphabet: Alphabet):
+        self.alphabet = alphabet
+        self.length = codes.shape[1]
+        self.keys = np.ascontiguousarray(codes).view(f"S{self.length}").ravel()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self) -> Iterator[str]:
+        codes = self.keys.view(np.uint8).reshape(-1, self.length)
+        return iter(CodedWords(codes, self.alphabet))
+
+    def __getitem__(self, word: str) -> int:
+        if (len(word) != self.length
+                or any(char not in self.alphabet.index for char in word)):
+            raise KeyError(word)
+        key = self.alphabet.encode([word]).view(f"S{self.length}")[0, 0]
+        i = int(np.searchsorted(self.keys, key))
+        if i == len(self.keys) or self.keys[i] != key:
+            raise KeyError(word)
+        return i
+
+
+class WordStore:
+    def __init__(self, words: List[str], alphabet: Alphabet | None = None):
+        self.words: Sequence[str] = words
+        self.word_ids: Mapping[str, int] = {word: i
+                                            for i, word in enumerate(words)}
+        self.alphabet = alphabet or Alphabet.from_words(words)
+        self.codes = self.alphabet.encode(words)
+        self.letter_masks = letter_masks_of(self.codes, self.alphabet)
+        self.words_hash: str | None = None
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, alphabet: Alphabet,
+                   letter_masks: np.ndarray | None = None,
+                   words_hash: str | None = None) -> Self:
+        store = cls.__new__(cls)
+        store.words = CodedWords(codes, alphabet)
+        store.word_ids = SortedCodeIndex(codes, alphabet)
+        store.alphabet = alphabet
+        store.codes = codes
+        if letter_masks is None:
+            letter_masks = letter_masks_of(codes, alphabet)
+        store.letter_masks = letter_masks
+        store.words_hash = words_hash
+        return store
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.word_ids
+
+    @property
+    def length(self) -> int:
+        return self.codes.shape[1]
+
+    @property
+    def fingerprint(self) -> str:
+        if self.words_hash is None:
+            self.words_hash = words_fingerprint(self.words)
+        return self.words_hash
+
+    def empty_constraint(self) -> Constraint:
+        return Constraint.empty(self.length, self.alphabet)
+
+    def indexed_filters(self) -> List[FilterFn]:
+        filters: List[FilterFn] = []
+        for char in self.alphabet.letters:
+            filters.append(IncludeCharFilter(char))
+            filters.append(DoesNotHaveCharFilter(char))
+            filters.extend(HasCharInPosFilter(char, pos)
+                           for pos in range(self.length))
+        return filters
+
+    def ids(self, words: Iterable[str]) -> np.ndarray:
+        ids = np.fromiter((self.word_ids[word] for word in words),
+                          dtype=np.intp)
+        ids.sort()
+        return ids
+
+    def words_of(self, ids: np.ndarray) -> List[str]:
+        return self.alphabet.decode(self.codes[ids])
+
+    def matches(self, filter: FilterFn, ids: np.ndarray) -> np.ndarray:
+        if isinstance(filter, IncludeCharFilter):
+            bit = self.alphabet.bit(filter.char)
+            return (self.letter_masks[ids] & bit) != 0
+        if isinstance(filter, DoesNotHaveCharFilter):
+            bit = self.alphabet.bit(filter.char)
+            return (self.letter_masks[ids] & bit) == 0
+        if isinstance(filter, HasCharInPosFilter):
+            index = self.alphabet.index.get(filter.char, -1)
+            return self.codes[ids, filter.pos] == index
+        if isinstance(filter, FeedbackFilter):
+            guess = self.alphabet.encode([filter.guess])
+            return pattern_rows(guess, self.codes[ids])[0] == filter.pattern
+        return np.fromiter((filter(self.words[i]) for i in ids), dtype=bool,
+                           count=len(ids))
+
+    def satisfying(self, constraint: Constraint,
+                   ids: np.ndarray) -> np.ndarray:
+        matched = constraint.matches_codes(self.codes[ids],
+                                           self.letter_masks[ids])
+        for filter in constraint.extra:
+            matched &= self.matches(filter, ids)
+        return ids[matched]
+
+
+def pack_ids(ids: np.ndarray, size: int) -> int:
+    bits = np.zeros(size, dtype=bool)
+    bits[ids] = True
+    packed = np.packbits(bits, bitorder="little").tobytes()
+    return int.from_bytes(packed, "little")
+
+
+def unpack_ids(mask: int, size: int) -> np.ndarray:
+    packed = mask.to_bytes((size + 7) // 8, "little")
+    bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8),
+                         bitorder="little")
+    return np.flatnonzero(bits[:size])
+
+
+class BitsetIndex:
+    def __init__(self, store: WordStore):
+        self.store = store
+        all_ids = np.arange(len(store))
+        self.masks = {f: self.mask_of_ids(all_ids[store.matches(f, all_ids)])
+                      for f in store.indexed_filters()}
+
+    def mask_of_ids(self, ids: np.ndarray) -> int:
+        return pack_ids(ids, len(self.store))
+
+    def mask_of(self, words: Iterable[str]) -> int:
+        return self.mask_of_ids(self.store.ids(words))
+
+    def ids_of(self, mask: int) -> np.ndarray:
+        return unpack_ids(mask, len(self.store))
+
+    def words_of(self, mask: int) -> Set[str]:
+        return set(self.store.words_of(self.ids_of(mask)))
+
+    def mask(self, f: FilterFn) -> int:
+        return self.masks.get(f, 0)
@@ -0,0 +1,226 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Self, Tuple
+import json
+import math
+
+import numpy as np
+
+from . import parallel
+from .engine import Engine, ids_fingerprint
+from .patterns import all_green, pattern_count
+
+
+DECISION_TREE_VERSION = 1
+DEFAULT_BREADTH = 3
+
+
+@dataclass
+class DecisionTree:
+    guess: str
+    answers: int
+    cost: int
+    children: Dict[int, "DecisionTree"] = field(default_factory=dict)
+    prefix: Tuple[Tuple[str, int], ...] = ()
+
+    @property
+    def expected_guesses(self) -> float:
+        return self.cost / self.answers
+
+    def depth(self) -> int:
+        return 1 + max((child.depth() for child in self.children.values()),
+                       default=0)
+
+    def walk(self, history: List[Tuple[str, int]]) -> Self | None:
+        if tuple(history[:len(self.prefix)]) != self.prefix:
+            return None
+        node = self
+        for guess, pattern in history[len(self.prefix):]:
+            if node is None or node.guess != guess:
+                return None
+            node = node.children.get(pattern)
+        return node
+
+    def to_json(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"guess": self.guess, "answers": self.answers,
+                                "cost": self.cost}
+        if self.children:
+            data["children"] = {str(pattern): child.to_json()
+                                for pattern, child in self.children.items()}
+        if self.prefix:
+            data["prefix"] = [[guess, pattern]
+                              for guess, pattern in self.prefix]
+        return data
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> Self:
+        children = data.get("children", {})
+        return cls(guess=data["guess"], answers=data["answers"],
+                   cost=data["cost"],
+                   children={int(pattern): cls.from_json(child)
+                             for pattern, child in children.items()},
+                   prefix=tuple((guess, pattern)
+                                for guess, pattern in data.get("prefix", ())))
+
+    def save(self, path: str, words_hash: str):
+        with open(path, "w") as f:
+            json.dump({"version": DECISION_TREE_VERSION,
+                       "words_hash": words_hash, "tree": self.to_json()}, f)
+
+    @classmethod
+    def load(cls, path: str, words_hash: str | None = None) -> Self:
+        tree, source_hash = cls.load_with_hash(path)
+        if words_hash is not None and source_hash != words_hash:
+            raise ValueError(f"Decision tree {path} was built for a different "
+                             "word list")
+        return tree
+
+    @classmethod
+    def load_with_hash(cls, path: str) -> Tuple[Self, str]:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != DECISION_TREE_VERSION:
+            raise ValueError(f"Unsupported decision tree version in {path}")
+        return cls.from_json(data["tree"]), data["words_hash"]
+
+
+def lower_bound(n: int, patterns_per_row: int) -> int:
+    total, depth, capacity = 0, 1, 1
+    while n > 0:
+        solved = min(n, capacity)
+        total += solved * depth
+        n -= solved
+        depth += 1
+        capacity *= patterns_per_row - 1
+    return total
+
+
+class TreeBuilder:
+    def __init__(self, engine: Engine, breadth: int = DEFAULT_BREADTH):
+        self.engine = engine
+        self.breadth = breadth
+        self.patterns_per_row = pattern_count(engine.store.length)
+        self.solved_pattern = all_green(engine.store.length)
+        self.memo: Dict[bytes, DecisionTree] = {}
+        self.bounds: Dict[bytes, int] = {}
+        self.nodes_searched = 0
+
+    def lower_bound(self, n: int) -> int:
+        return lower_bound(n, self.patterns_per_row)
+
+    def guess_pool(self, ids: np.ndarray) -> List[int]:
+        self.engine.set_candidates(ids)
+        scores = self.engine.entropy_many(self.engine.word_list)
+        is_candidate = np.zeros(len(scores), dtype=bool)
+        is_candidate[ids] = True
+        order = np.lexsort((is_candidate, scores))[::-1]
+        candidates = ids[np.argsort(-scores[ids], kind="stable")]
+        pool = dict.fromkeys([*order[:self.breadth].tolist(),
+                              *candidates[:self.breadth].tolist()])
+        return list(pool)
+
+    def partition(self, guess_id: int,
+                  ids: np.ndarray) -> Dict[int, np.ndarray]:
+        self.engine.set_candidates(ids)
+        guess = self.engine.word_list[guess_id]
+        patterns = next(self.engine.candidate_pattern_chunks([guess]))[0]
+        order = np.argsort(patterns, kind="stable")
+        values, starts = np.unique(patterns[order], return_index=True)
+        buckets = np.split(order, starts[1:])
+        return {int(pattern): ids[bucket]
+                for pattern, bucket in zip(values, buckets)}
+
+    def leaf(self, ids: np.ndarray) -> DecisionTree:
+        return DecisionTree(guess=self.engine.word_list[ids[0]], answers=1,
+                            cost=1)
+
+    def search(self, ids: np.ndarray,
+               budget: float = math.inf) -> DecisionTree | None:
+        if len(ids) == 1:
+            return self.leaf(ids)
+        key = ids_fingerprint(ids)
+        if key in self.memo:
+            tree = self.memo[key]
+            return tree if tree.cost < budget else None
+        if max(self.bounds.get(key, 0), self.lower_bound(len(ids))) >= budget:
+            return None
+        self.nodes_searched += 1
+        best: DecisionTree | None = None
+        for guess_id in self.guess_pool(ids):
+            tree = self.search_guess(ids, guess_id, budget)
+            if tree is not None:
+                best, budget = tree, tree.cost
+        if best is None:
+            self.bounds[key] = max(self.bounds.get(key, 0), int(budget))
+        else:
+            self.memo[key] = best
+        return best
+
+    def search_guess(self, ids: np.ndarray, guess_id: int,
+                     budget: float = math.inf) -> DecisionTree | None:
+        buckets = self.partition(guess_id, ids)
+        buckets.pop(self.solved_pattern, None)
+        if len(buckets) == 1 and len(next(iter(buckets.values()))) == len(ids):
+            return None
+        remaining = sum(self.lower_bound(len(bucket))
+                        for bucket in buckets.values())
+        cost = len(ids)
+        if cost + remaining >= budget:
+            return None
+        children: Dict[int, DecisionTree] = {}
+        for pattern, bucket in sorted(buckets.items(),
+                                      key=lambda item: -len(item[1])):
+            remaining -= self.lower_bound(len(bucket))
+            child = self.search(bucket, budget - cost - remaining)
+            if child is None:
+                return None
+            cost += child.cost
+            children[pattern] = child
+        return DecisionTree(guess=self.engine.word_list[guess_id],
+                            answers=len(ids), cost=cost, children=children)
+
+    def build(self, workers: int = 1) -> DecisionTree:
+        ids = self.engine.candidate_ids
+        try:
+            if len(ids) == 1 or workers <= 1:
+                tree = self.search(ids)
+            else:
+                tree = self.build_parallel(ids, workers)
+        finally:
+            self.engine.set_candidates(ids)
+        return replace(tree, prefix=tuple(self.engine.feedback_history))
+
+    def build_parallel(self, ids: np.ndarray, workers: int) -> DecisionTree:
+        first, *rest = self.guess_pool(ids)
+        best = self.search_guess(ids, first)
+        context = parallel.fork_context()
+        forked = context.get_start_method() == "fork"
+        global forked_builder
+        forked_builder = self if forked else None
+        shipped = None if forked else self
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=init_tree_worker,
+                                     initargs=(shipped,)) as pool:
+                trees = list(pool.map(search_root, [ids] * len(rest), rest,
+                                      [best.cost] * len(rest)))
+        finally:
+            forked_builder = None
+        for tree in trees:
+            if tree is not None and tree.cost < best.cost:
+                best = tree
+        return best
+
+
+forked_builder: TreeBuilder | None = None
+worker_builder: TreeBuilder | None = None
+
+
+def init_tree_worker(builder: TreeBuilder | None):
+    global worker_builder
+    worker_builder = builder if builder is not None else forked_builder
+
+
+def search_root(ids: np.ndarray, guess_id: int,
+                budget: int) -> DecisionTree | None:
+    return worker_builder.search_guess(ids, guess_id, budget)
@@ -0,0 +1,141 @@
+from typing import TYPE_CHECKING, Dict, List, Self, Tuple
+import struct
+
+import numpy as np
+
+from .patterns import all_green, feedback_pattern, pattern_count
+
+if TYPE_CHECKING:
+    from .tree import DecisionTree
+
+
+TREE_FILE_MAGIC = b"WTRE"
+TREE_FILE_VERSION = 2
+TREE_FILE_HEADER = struct.Struct("<4sBBxxIIII32s")
+NO_CHILD = -1
+
+
+def padded(size: int, alignment: int = 8) -> int:
+    return -(-size // alignment) * alignment
+
+
+def flatten_tree(tree: "DecisionTree") -> Tuple[List[str], np.ndarray,
+                                                np.ndarray, np.ndarray]:
+    nodes: List["DecisionTree"] = [tree]
+    for node in nodes:
+        nodes.extend(node.children.values())
+    words = sorted({node.guess for node in nodes}
+                   | {guess for guess, _ in tree.prefix})
+    word_ids = {word: i for i, word in enumerate(words)}
+    prefix = np.array([[word_ids[guess], pattern]
+                       for guess, pattern in tree.prefix],
+                      dtype=np.int32).reshape(-1, 2)
+    node_ids = {id(node): i for i, node in enumerate(nodes)}
+    guess_ids = np.array([word_ids[node.guess] for node in nodes],
+                         dtype=np.int32)
+    children = np.full((len(nodes), pattern_count(len(tree.guess))),
+                       NO_CHILD, dtype=np.int32)
+    for i, node in enumerate(nodes):
+        for pattern, child in node.children.items():
+            children[i, pattern] = node_ids[id(child)]
+    return words, guess_ids, children, prefix
+
+
+def write_tree_file(tree: "DecisionTree", words_hash: str, path: str):
+    words, guess_ids, children, prefix = flatten_tree(tree)
+    text = "\n".join(words).encode("utf-8")
+    header = TREE_FILE_HEADER.pack(TREE_FILE_MAGIC, TREE_FILE_VERSION,
+                                   len(tree.guess), children.shape[1],
+                                   len(guess_ids), len(text), len(prefix),
+                                   bytes.fromhex(words_hash))
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(text.ljust(padded(len(text)), b"\0"))
+        f.write(prefix.tobytes())
+        f.write(guess_ids.tobytes())
+        f.write(children.tobytes())
+
+
+class TreeFile:
+    def __init__(self, words: List[str], guess_ids: np.ndarray,
+                 children: np.ndarray, words_hash: str,
+                 prefix: Tuple[Tuple[str, int], ...] = ()):
+        self.words = words
+        self.guess_ids = guess_ids
+        self.children = children
+        self.words_hash = words_hash
+        self.prefix = prefix
+        self.length = len(words[0]) if words else 0
+        self.solved_pattern = all_green(self.length)
+
+    @classmethod
+    def load(cls, path: str, words_hash: str | None = None) -> Self:
+        with open(path, "rb") as f:
+            header = f.read(TREE_FILE_HEADER.size)
+            (magic, version, _, patterns, nodes, text_size, prefix_size,
+             source_hash) = TREE_FILE_HEADER.unpack(header)
+            text = f.read(padded(text_size))[:text_size].decode("utf-8")
+            prefix = np.frombuffer(f.read(8 * prefix_size), dtype=np.int32)
+        if magic != TREE_FILE_MAGIC or version != TREE_FILE_VERSION:
+            raise ValueError(f"Unsupported tree file format in {path}")
+        if words_hash is not None and source_hash.hex() != words_hash:
+            raise ValueError(f"Tree file {path} was built for a different "
+                             "word list")
+        offset = TREE_FILE_HEADER.size + padded(text_size) + prefix.nbytes
+        guess_ids = np.memmap(path, dtype=np.int32, mode="r", offset=offset,
+                              shape=(nodes,))
+        children = np.memmap(path, dtype=np.int32, mode="r",
+                             offset=offset + guess_ids.nbytes,
+                             shape=(nodes, patterns))
+        words = text.split("\n")
+        return cls(words, guess_ids, children, source_hash.hex(),
+                   tuple((words[guess_id], int(pattern))
+                         for guess_id, pattern in prefix.reshape(-1, 2)))
+
+    def __len__(self):
+        return len(self.guess_ids)
+
+    def guess(self, node: int) -> str:
+        return self.words[self.guess_ids[node]]
+
+    def child(self, node: int, pattern: int) -> int:
+        return int(self.children[node, pattern])
+
+    def covers(self, answer: str) -> bool:
+        return all(feedback_pattern(guess, answer) == pattern
+                   for guess, pattern in self.prefix)
+
+    def walk(self, history: List[Tuple[str, int]]) -> int:
+        if tuple(history[:len(self.prefix)]) != self.prefix:
+            return NO_CHILD
+        node = 0
+        for guess, pattern in history[len(self.prefix):]:
+            if node == NO_CHILD or self.guess(node) != guess:
+                return NO_CHILD
+            node = self.child(node, pattern)
+        return node
+
+    def next_guess(self, history: List[Tuple[str, int]]) -> str | None:
+        node = self.walk(history)
+        return None if node == NO_CHILD else self.guess(node)
+
+    def play(self, answer: str) -> List[str]:
+        guesses: List[str] = []
+        for guess, pattern in self.prefix:
+            guesses.append(guess)
+            if feedback_pattern(guess, answer) != pattern:
+                return guesses
+        node = 0
+        while node != NO_CHILD:
+            guess = self.guess(node)
+            guesses.append(guess)
+            pattern = feedback_pattern(guess, answer)
+            if pattern == self.solved_pattern:
+                break
+            node = self.child(node, pattern)
+        return guesses
+
+    def stats(self) -> Dict[str, int]:
+        return {"nodes": len(self), "words": len(self.words),
+                "prefix": len(self.prefix),
+                "bytes": self.guess_ids.nbytes + self.children.nbytes}